@@ -1,79 +1,78 @@
 # analysis.py
 # (放在 analysis.py 顶部)
-import pandas as pd
-import matplotlib
-matplotlib.use('Agg') # 关键：设置为“非交互式”后端，防止GUI窗口
-import matplotlib.pyplot as plt
-import seaborn as sns
-from matplotlib.dates import DateFormatter
+# 注意：pandas / matplotlib / seaborn 导入耗时约 1 秒，只在真正需要它们的函数内部导入，
+# 这样 goal list / start / stop / log 等简单命令不必为它们付出启动时间。
 import click
+import os
 import recommender
 import database
 from datetime import datetime, timedelta
 
-# (get_energy_assessment 函数保持不变)
-# (替换 analysis.py 中的旧 get_energy_assessment 函数)
-def get_energy_assessment(conn, reference_date=None):
+# --- 批量能量评估引擎 ---
+# 评估所需的指标一次性从数据库读出，再用 pandas 的窗口运算计算每一天的
+# 7 天 RHR 基线和 3 天平均训练负荷，避免 journal / plan 逐日逐项查询。
+ASSESSMENT_METRICS = ('sleep_total_min', 'rhr_avg', 'stress_avg', 'workout_train_load')
+
+def assess_range(conn, start_date, end_date):
     """
-    分析指定日期的心率和睡眠数据，评估能量状态。
-    如果 reference_date 为 None，则默认为今天。
+    批量评估 [start_date, end_date] 中每一天的能量状态和能量预算。
+    返回 {date: {'assessment': {...}, 'budget': int}}，
+    每一天的结果与单独调用 get_energy_assessment / get_daily_energy_budget 相同。
     """
-    if reference_date is None:
-        reference_date = datetime.now().date()
+    import pandas as pd
+
+    # 基线需要向前多取 7 天的数据
+    load_start = start_date - timedelta(days=7)
+    placeholders = ", ".join("?" for _ in ASSESSMENT_METRICS)
+    df = pd.read_sql_query(f"""
+        SELECT timestamp, metric_type, value_numeric FROM health_metrics
+        WHERE metric_type IN ({placeholders}) AND timestamp >= ? AND timestamp < ?
+        ORDER BY timestamp
+    """, conn, params=(*ASSESSMENT_METRICS, *database.day_bounds(load_start, end_date)))
+
+    df['day'] = pd.to_datetime(df['timestamp'].str[:10])
+    df['value_numeric'] = pd.to_numeric(df['value_numeric'])
+    calendar = pd.date_range(load_start, end_date, freq='D')
+
+    def latest_per_day(metric, positive_only=True):
+        rows = df[df['metric_type'] == metric]
+        if positive_only:
+            rows = rows[rows['value_numeric'] > 0]
+        return rows.groupby('day')['value_numeric'].last().reindex(calendar)
+
+    def trailing_mean(metric, window):
+        # 前 window 天 (不含当天) 所有正值记录的平均值
+        rows = df[(df['metric_type'] == metric) & (df['value_numeric'] > 0)]
+        daily = rows.groupby('day')['value_numeric'].agg(['sum', 'count']).reindex(calendar, fill_value=0)
+        windowed = daily.rolling(window, min_periods=1).sum().shift(1).fillna(0)
+        return (windowed['sum'] / windowed['count']).where(windowed['count'] > 0)
+
+    frame = pd.DataFrame({
+        'sleep_total_min': latest_per_day('sleep_total_min', positive_only=False),
+        'latest_rhr': latest_per_day('rhr_avg'),
+        'rhr_baseline': trailing_mean('rhr_avg', 7),
+        'latest_stress': latest_per_day('stress_avg'),
+        'avg_train_load': trailing_mean('workout_train_load', 3),
+    }, index=calendar)
+
+    results = {}
+    for day, row in frame.loc[pd.Timestamp(start_date):].iterrows():
+        assessment = _evaluate_assessment(
+            sleep_hours=float(row['sleep_total_min'] / 60) if pd.notna(row['sleep_total_min']) else 0,
+            latest_rhr=float(row['latest_rhr']) if pd.notna(row['latest_rhr']) else 0,
+            rhr_baseline=float(row['rhr_baseline']) if pd.notna(row['rhr_baseline']) else 60,
+            latest_stress=float(row['latest_stress']) if pd.notna(row['latest_stress']) else 0,
+            avg_train_load=float(row['avg_train_load']) if pd.notna(row['avg_train_load']) else 0,
+        )
+        results[day.date()] = {
+            'assessment': assessment,
+            'budget': _budget_from_assessment(assessment),
+        }
+    return results
 
-    ref_date_str = reference_date.isoformat()
-    # 基线计算需要前7天和前3天的数据
-    seven_days_ago_str = (reference_date - timedelta(days=7)).isoformat()
-    three_days_ago_str = (reference_date - timedelta(days=3)).isoformat()
 
-    c = conn.cursor()
-    
-    # 1. 获取当天的睡眠数据
-    c.execute("""
-        SELECT value_numeric FROM health_metrics
-        WHERE metric_type = 'sleep_total_min' AND DATE(timestamp) = ?
-        ORDER BY timestamp DESC LIMIT 1
-    """, (ref_date_str,))
-    sleep_data = c.fetchone()
-    sleep_hours = (sleep_data[0] / 60) if sleep_data else 0
-
-    # 2. 获取当天的静息心率 (RHR)
-    c.execute("""
-        SELECT value_numeric FROM health_metrics
-        WHERE metric_type = 'rhr_avg' AND value_numeric > 0 AND DATE(timestamp) = ?
-        ORDER BY timestamp DESC LIMIT 1
-    """, (ref_date_str,))
-    rhr_data = c.fetchone()
-    latest_rhr = rhr_data[0] if rhr_data else 0
-
-    # 3. 获取前7天的 RHR 基线 (不包括当天)
-    c.execute("""
-        SELECT AVG(value_numeric) FROM health_metrics
-        WHERE metric_type = 'rhr_avg' AND value_numeric > 0
-          AND DATE(timestamp) >= ? AND DATE(timestamp) < ?
-    """, (seven_days_ago_str, ref_date_str))
-    rhr_baseline_data = c.fetchone()
-    rhr_baseline = rhr_baseline_data[0] if rhr_baseline_data and rhr_baseline_data[0] else 60
-
-    # 4. 获取当天的压力
-    c.execute("""
-        SELECT value_numeric FROM health_metrics
-        WHERE metric_type = 'stress_avg' AND value_numeric > 0 AND DATE(timestamp) = ?
-        ORDER BY timestamp DESC LIMIT 1
-    """, (ref_date_str,))
-    stress_data = c.fetchone()
-    latest_stress = stress_data[0] if stress_data else 0
-
-    # 5. 获取前3天的平均训练负荷 (不包括当天)
-    c.execute("""
-        SELECT AVG(value_numeric) FROM health_metrics
-        WHERE metric_type = 'workout_train_load' AND value_numeric > 0
-          AND DATE(timestamp) >= ? AND DATE(timestamp) < ?
-    """, (three_days_ago_str, ref_date_str))
-    train_load_data = c.fetchone()
-    avg_train_load = train_load_data[0] if train_load_data and train_load_data[0] else 0
-
-    # (评估逻辑保持不变)
+def _evaluate_assessment(sleep_hours, latest_rhr, rhr_baseline, latest_stress, avg_train_load):
+    """根据单日的指标评估能量状态 (Ready / Fatigued / Stressed / No Data)。"""
     assessment = {
         'state': 'Ready',
         'sleep_hours': sleep_hours,
@@ -110,18 +109,8 @@ def get_energy_assessment(conn, reference_date=None):
     return assessment
 
 
-def get_daily_energy_budget(conn, reference_date=None):
-    """
-    根据健康数据计算每日能量预算。
-    基础预算根据睡眠质量和恢复状态调整。
-    
-    返回一个整数，代表今日可用的能量点数。
-    """
-    if reference_date is None:
-        reference_date = datetime.now().date()
-    
-    assessment = get_energy_assessment(conn, reference_date)
-    
+def _budget_from_assessment(assessment):
+    """根据评估结果计算能量预算点数。"""
     # 基础预算（默认值）
     base_budget = 50
     
@@ -171,6 +160,75 @@ def get_daily_energy_budget(conn, reference_date=None):
     return max(5, base_budget)
 
 
+def get_energy_assessment(conn, reference_date=None):
+    """
+    分析指定日期的心率和睡眠数据，评估能量状态。
+    如果 reference_date 为 None，则默认为今天。
+    """
+    if reference_date is None:
+        reference_date = datetime.now().date()
+    return assess_range(conn, reference_date, reference_date)[reference_date]['assessment']
+
+
+def get_daily_energy_budget(conn, reference_date=None):
+    """
+    根据健康数据计算每日能量预算。
+    基础预算根据睡眠质量和恢复状态调整。
+    
+    返回一个整数，代表今日可用的能量点数。
+    """
+    if reference_date is None:
+        reference_date = datetime.now().date()
+    return assess_range(conn, reference_date, reference_date)[reference_date]['budget']
+# --- 批量能量评估引擎结束 ---
+
+
+# --- 日内特征 (来自 timeseries 分块存储) ---
+HR_ELEVATED_BPM = 100       # 非运动时段心率高于此值视为偏高
+STRESS_HIGH_LEVEL = 60      # 小米压力值 60+ 为中度/重度压力
+MAX_SAMPLE_GAP_SEC = 300    # 采样间隔超过 5 分钟视为佩戴中断，不计入时长
+
+def _sample_minutes(timestamps):
+    """每个采样代表的时长 (分钟)：到下一个采样的间隔，超过 MAX_SAMPLE_GAP_SEC 的按 0 计。"""
+    import numpy as np
+    gaps = np.diff(timestamps, append=timestamps[-1] + 60)
+    return np.where(gaps > MAX_SAMPLE_GAP_SEC, 0, gaps) / 60.0
+
+def get_intraday_features(conn, start_date, end_date=None):
+    """
+    由日内心率和压力采样计算 [start_date, end_date] 每天的特征，返回 {'YYYY-MM-DD': {...}}。
+    每个指标只读一次整个区间的数据块，没有日内数据的日期不会出现在结果中。
+    """
+    import numpy as np
+    import timeseries
+
+    features = {}
+    for day, (ts, bpm) in timeseries.read_daily(conn, 'heart_rate', start_date, end_date).items():
+        minutes = _sample_minutes(ts)
+        features.setdefault(day, {}).update({
+            'hr_samples': len(bpm),
+            'hr_mean': float(bpm.mean()),
+            'hr_min': float(bpm.min()),
+            'hr_max': float(bpm.max()),
+            'hr_p5': float(np.percentile(bpm, 5)),  # 近似当天的静息心率
+            'hr_elevated_min': float(minutes[bpm >= HR_ELEVATED_BPM].sum()),
+        })
+
+    for day, (ts, stress) in timeseries.read_daily(conn, 'stress', start_date, end_date).items():
+        minutes = _sample_minutes(ts)
+        high = stress >= STRESS_HIGH_LEVEL
+        # 最长连续高压力时段：非高压力采样把序列切成若干段，按段编号累加时长后取最大值
+        run_ids = np.cumsum(~high)
+        longest = np.bincount(run_ids[high], weights=minutes[high]).max() if high.any() else 0.0
+        features.setdefault(day, {}).update({
+            'stress_samples': len(stress),
+            'stress_mean': float(stress.mean()),
+            'stress_high_min': float(minutes[high].sum()),
+            'stress_longest_high_min': float(longest),
+        })
+    return features
+
+
 # --- 升级：新增的进度条辅助函数 ---
 def _create_bar_and_color(value, thresholds, bar_length=10):
     """
@@ -296,13 +354,13 @@ def print_health_analysis(health_stats):
     # --- 升级结束 ---
 
 # --- 升级：提取数据逻辑供 API 使用 ---
-def get_weekly_report_data(conn):
+def get_weekly_report_data(conn, days=7):
     """
-    获取周报数据，返回字典格式。
+    获取周报数据 (默认最近 7 天)，返回字典格式。
     """
     c = conn.cursor()
     today = datetime.now()
-    last_week = today - timedelta(days=7)
+    last_week = today - timedelta(days=days)
 
     # 1. 优先级分组统计
     c.execute("""
@@ -357,27 +415,30 @@ def get_weekly_report_data(conn):
         'consumption': []
     }
     
+    # 洞察来自按天汇总的活动统计索引 (按整天计算，包含 last_week 当天)
+    since_day = database.day_start(last_week)
     c.execute("""
-        SELECT activity, SUM(duration_minutes) FROM events
-        WHERE key_state = 'Internal friction' AND timestamp_start >= ?
-        GROUP BY activity ORDER BY SUM(duration_minutes) DESC LIMIT 3
-    """, (last_week,))
+        SELECT activity, SUM(total_minutes) FROM activity_daily_stats
+        WHERE key_state = 'Internal friction' AND day >= ?
+        GROUP BY activity ORDER BY SUM(total_minutes) DESC LIMIT 3
+    """, (since_day,))
     for row in c.fetchall():
         insights['internal_friction'].append({'activity': row[0], 'value': row[1]})
 
     c.execute("""
-        SELECT activity, COUNT(*) as count FROM events
-        WHERE key_state = 'Abundance' AND timestamp_start >= ?
+        SELECT activity, SUM(event_count) as count FROM activity_daily_stats
+        WHERE key_state = 'Abundance' AND day >= ?
         GROUP BY activity ORDER BY count DESC LIMIT 3
-    """, (last_week,))
+    """, (since_day,))
     for row in c.fetchall():
         insights['abundance'].append({'activity': row[0], 'value': row[1]})
 
     c.execute("""
-        SELECT activity, AVG(duration_minutes) FROM events
-        WHERE key_state = 'Consumption' AND timestamp_start >= ?
-        GROUP BY activity ORDER BY AVG(duration_minutes) DESC LIMIT 3
-    """, (last_week,))
+        SELECT activity, CAST(SUM(total_minutes) AS REAL) / SUM(event_count) AS avg_minutes
+        FROM activity_daily_stats
+        WHERE key_state = 'Consumption' AND day >= ?
+        GROUP BY activity ORDER BY avg_minutes DESC LIMIT 3
+    """, (since_day,))
     for row in c.fetchall():
         insights['consumption'].append({'activity': row[0], 'value': row[1]})
 
@@ -419,8 +480,9 @@ def get_daily_plan_data(conn):
     }
 
     try:
-        today_budget = get_daily_energy_budget(conn, reference_date=yesterday)
-        assessment = get_energy_assessment(conn, reference_date=yesterday)
+        yesterday_result = assess_range(conn, yesterday, yesterday)[yesterday]
+        today_budget = yesterday_result['budget']
+        assessment = yesterday_result['assessment']
         
         data['budget'] = {
             'total': today_budget,
@@ -469,7 +531,7 @@ def get_daily_plan_data(conn):
     
     # 推荐
     data['recommendations']['sleep'] = recommender.get_sleep_recommendation(conn)
-    data['recommendations']['exercise'] = recommender.get_exercise_recommendation(conn)
+    data['recommendations']['exercise'] = recommender.get_exercise_recommendation(conn, assessment)
     
     return data
 
@@ -586,9 +648,9 @@ def journal(days):
                      g.goal_name, g.priority_level, g.energy_cost
               FROM events e
                        LEFT JOIN goals g ON e.goal_id = g.goal_id
-              WHERE DATE (e.timestamp_start) >= ?
+              WHERE e.timestamp_start >= ?
               ORDER BY e.timestamp_start DESC
-              """, (start_date,))
+              """, (database.day_start(start_date),))
     all_events = c.fetchall()
 
     events_by_date = {}
@@ -598,23 +660,12 @@ def journal(days):
             events_by_date[event_date] = []
         events_by_date[event_date].insert(0, event) # 按时间正序
 
-    # (SQL 查询 2: 获取客观指标)
-    c.execute("""
-              SELECT timestamp, metric_type, value_numeric
-              FROM health_metrics
-              WHERE DATE (timestamp) >= ? AND value_numeric > 0
-              ORDER BY timestamp
-              """, (start_date,))
-    all_metrics = c.fetchall()
-
-    metrics_by_date = {}
-    for metric in all_metrics:
-        metric_date = datetime.fromisoformat(metric[0]).date()
-        metric_type = metric[1]
-        metric_value = metric[2]
-        if metric_date not in metrics_by_date:
-            metrics_by_date[metric_date] = {}
-        metrics_by_date[metric_date][metric_type] = metric_value
+    # (查询 2: 从每日汇总表 daily_health 获取客观指标)
+    daily_health = database.get_daily_health(conn, start_date, datetime.now().date())
+    metrics_by_date = {
+        datetime.fromisoformat(day).date(): day_metrics
+        for day, day_metrics in daily_health.items()
+    }
 
     all_dates = sorted(list(set(events_by_date.keys()) | set(metrics_by_date.keys())), reverse=True)
 
@@ -623,18 +674,21 @@ def journal(days):
         conn.close()
         return
 
-    # --- 升级: 循环并计算预算 ---
+    # --- 升级: 一次性批量计算所有日期的预算 ---
+    daily_results = assess_range(conn, all_dates[-1], all_dates[0])
+    intraday_by_date = get_intraday_features(conn, all_dates[-1], all_dates[0])
+
     for date in all_dates:
         click.echo(click.style(f"\n--- {date.strftime('%Y-%m-%d, %A')} ---", bold=True, fg="blue"))
 
-        # --- 升级 (1): 调用每日预算 ---
+        # --- 升级 (1): 每日预算 ---
         # (这会根据当天的客观数据计算初始预算)
-        initial_budget = get_daily_energy_budget(conn, reference_date=date)
+        initial_budget = daily_results[date]['budget']
 
         # (客观指标部分保持不变)
         click.echo(click.style("  Objective Health (来自手环):", bold=True))
         day_metrics = metrics_by_date.get(date)
-        if day_metrics:
+        if day_metrics is not None:
             # (省略了内部的打印逻辑，与您现有的代码相同)
             key_metrics_map = {
                 'sleep_score': '睡眠得分', 'sleep_total_min': '睡眠时长',
@@ -660,6 +714,15 @@ def journal(days):
         else:
             click.echo("    (当天没有导入客观健康数据。)")
 
+        intraday = intraday_by_date.get(date.isoformat())
+        if intraday:
+            if 'hr_samples' in intraday:
+                click.echo(f"    - 日内心率: {intraday['hr_min']:.0f}-{intraday['hr_max']:.0f} "
+                           f"(均值 {intraday['hr_mean']:.0f}，≥{HR_ELEVATED_BPM} 共 {intraday['hr_elevated_min']:.0f} 分钟)")
+            if 'stress_samples' in intraday:
+                click.echo(f"    - 日内压力: 均值 {intraday['stress_mean']:.0f}，高压力 {intraday['stress_high_min']:.0f} 分钟 "
+                           f"(最长连续 {intraday['stress_longest_high_min']:.0f} 分钟)")
+
         click.echo(click.style("\n  Subjective Log (您的记录):", bold=True))
         day_events = events_by_date.get(date)
         total_daily_cost = 0 # 跟踪总消耗
@@ -737,25 +800,16 @@ def trend(days):
     # 2. 准备一个字典来按天存储所有数据
     all_data = {}
 
-    # 3. [SQL 查询 1] 获取客观健康指标 (使用 SQL PIVOT)
-    c.execute("""
-              SELECT
-                  DATE (timestamp) as day, MAX (CASE WHEN metric_type = 'sleep_score' THEN value_numeric ELSE NULL END) as sleep_score, MAX (CASE WHEN metric_type = 'sleep_total_min' THEN value_numeric ELSE NULL END) as sleep_total, MAX (CASE WHEN metric_type = 'rhr_avg' THEN value_numeric ELSE NULL END) as rhr, MAX (CASE WHEN metric_type = 'stress_avg' THEN value_numeric ELSE NULL END) as stress
-              FROM health_metrics
-              WHERE DATE (timestamp) >= ? AND DATE (timestamp) <= ?
-              GROUP BY day
-              """, (start_date, end_date))
-
-    obj_metrics = c.fetchall()
+    # 3. [查询 1] 从每日汇总表 daily_health 获取客观健康指标 (同一天有多个读数时取最大值)
+    daily_health = database.get_daily_health(conn, start_date, end_date, aggregate='max')
 
     # 填充 all_data 字典
-    for row in obj_metrics:
-        day, sleep_score, sleep_total, rhr, stress = row
+    for day, day_metrics in daily_health.items():
         all_data[day] = {
-            'sleep_score': sleep_score,
-            'sleep_total': sleep_total,
-            'rhr': rhr,
-            'stress': stress
+            'sleep_score': day_metrics.get('sleep_score'),
+            'sleep_total': day_metrics.get('sleep_total_min'),
+            'rhr': day_metrics.get('rhr_avg'),
+            'stress': day_metrics.get('stress_avg')
         }
 
     # 4. [SQL 查询 2] 获取主观日志聚合 (按小时)
@@ -763,9 +817,9 @@ def trend(days):
               SELECT
                   DATE (timestamp_start) as day, key_state, SUM (duration_minutes) / 60.0 as total_hours
               FROM events
-              WHERE DATE (timestamp_start) >= ? AND DATE (timestamp_start) <= ?
+              WHERE timestamp_start >= ? AND timestamp_start < ?
               GROUP BY day, key_state
-              """, (start_date, end_date))
+              """, database.day_bounds(start_date, end_date))
 
     subj_metrics = c.fetchall()
 
@@ -846,86 +900,44 @@ def trend(days):
 @click.command()
 @click.option('--metric',
               default='sleep_score',
-              type=click.Choice(['sleep_score', 'stress_avg', 'rhr_avg', 'steps_total'], case_sensitive=False),
-              help='您想要绘制的健康指标。')
+              type=click.Choice(['all', 'sleep_score', 'stress_avg', 'rhr_avg', 'steps_total'], case_sensitive=False),
+              help='您想要绘制的健康指标 (all: 全部指标)。')
 @click.option('--days', default=30, type=int, help='您想要查看的过去天数。')
-@click.option('--output', default=None, help='输出图像的文件名 (例如: my_plot.png)')
-def plot(metric, days, output):
+@click.option('--output', default=None,
+              help='输出图像的文件名 (例如: my_plot.png)；--metric all 时为输出目录。')
+@click.option('--workers', default=None, type=int, help='并行渲染的进程数 (默认: CPU 核数)。')
+def plot(metric, days, output, workers):
     """
-    生成一个健康指标的时间序列折线图并将其保存为文件。
+    生成健康指标的时间序列折线图并将其保存为文件。
 
-    此命令不会“显示”图表，而是将其保存为一个PNG文件。
+    此命令不会“显示”图表，而是将其保存为PNG文件。数据没有变化的图表直接使用缓存，不会重新渲染。
     """
-    click.echo(f"正在为 '{metric}' 生成过去 {days} 天的图表...")
-
-    conn = database.create_connection()
-    c = conn.cursor()
-
-    end_date = datetime.now().date()
-    start_date = end_date - timedelta(days=days - 1)
-
-    # 1. 从数据库获取数据
-    # (您在 importer.py 中定义的指标名称)
-    c.execute("""
-              SELECT
-                  DATE (timestamp) as day, value_numeric
-              FROM health_metrics
-              WHERE DATE (timestamp) >= ?
-                AND DATE (timestamp) <= ?
-                AND metric_type = ?
-              ORDER BY day
-              """, (start_date, end_date, metric))
-
-    data = c.fetchall()
-
-    if not data:
-        click.echo(click.style(f"错误: 在过去 {days} 天内未找到 '{metric}' 的数据。", fg="red"))
-        conn.close()
-        return
-
-    # 2. 将数据转换为 Pandas DataFrame (Seaborn 最擅长处理)
-    df = pd.DataFrame(data, columns=['date', 'value'])
-    df['date'] = pd.to_datetime(df['date'])
-    df['value'] = pd.to_numeric(df['value'])
+    import shutil
+    import plots
 
-    # 3. 创建图表 (使用 plt.figure 来确保图表被正确创建)
-    plt.figure(figsize=(12, 7))  # 设置图表大小
-    sns.set_theme(style="whitegrid")
-
-    # 绘制数据折线
-    g = sns.lineplot(data=df, x='date', y='value', marker='o', label=f'每日 {metric}')
-
-    # 绘制7天滚动平均线，让趋势更清晰
-    df['7-day avg'] = df['value'].rolling(window=7, min_periods=1).mean()
-    sns.lineplot(data=df, x='date', y='7-day avg', color='red', linestyle='--', label='7天滚动平均')
-
-    g.set_title(f"每日 {metric.replace('_', ' ').title()} (过去 {days} 天)", fontsize=16)
-    g.set_xlabel("日期", fontsize=12)
-    g.set_ylabel(metric.replace('_', ' ').title(), fontsize=12)
-
-    # 格式化X轴的日期，使其更易读
-    date_form = DateFormatter("%m-%d")
-    g.xaxis.set_major_formatter(date_form)
-    plt.xticks(rotation=45)
-
-    plt.legend()
-    plt.tight_layout()  # 自动调整布局，防止标签被截断
-
-    # 4. 保存图表到文件 (替换 plt.show())
-    if not output:
-        output_filename = f"daily_{metric}_trend.png"
-    else:
-        output_filename = output
+    metrics = plots.PLOT_METRICS if metric == 'all' else [metric]
+    click.echo(f"正在为 {', '.join(metrics)} 生成过去 {days} 天的图表...")
 
+    conn = database.create_connection()
     try:
-        plt.savefig(output_filename)  # <-- 关键步骤
+        paths = plots.render_plots(conn, metrics, days, workers=workers)
+    finally:
         conn.close()
-        click.echo(click.style(f"\n成功! 图表已保存至: {output_filename}", fg="green"))
-    except Exception as e:
-        conn.close()
-        click.echo(click.style(f"\n保存图表时出错: {e}", fg="red"))
 
-    # 释放内存
-    plt.clf()
+    if metric == 'all' and output:
+        os.makedirs(output, exist_ok=True)
+    for name, path in paths.items():
+        if path is None:
+            click.echo(click.style(f"错误: 在过去 {days} 天内未找到 '{name}' 的数据。", fg="red"))
+            continue
+        if metric == 'all':
+            output_filename = os.path.join(output or '.', f"daily_{name}_trend.png")
+        else:
+            output_filename = output or f"daily_{name}_trend.png"
+        try:
+            shutil.copyfile(path, output_filename)
+            click.echo(click.style(f"成功! 图表已保存至: {output_filename}", fg="green"))
+        except OSError as e:
+            click.echo(click.style(f"保存图表时出错: {e}", fg="red"))
 
 # --- END: New 'plot' command ---
\ No newline at end of file
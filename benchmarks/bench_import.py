@@ -0,0 +1,167 @@
+# benchmarks/bench_import.py
+"""
+导入吞吐量基准。
+
+用 generate_export.py 生成一份固定规模、固定种子的合成导出，对每个文件在独立的子进程中
+运行 importer 的解析函数 + database.insert_health_metrics_stream (import 命令实际使用的写入路径)，
+写入一个刚初始化的临时数据库，报告:
+  * 每秒处理的 CSV 行数和每秒写入的指标行数；
+  * 子进程的峰值 RSS；
+  * 数据库文件 (含 WAL) 的增长。
+
+结果可以保存为 JSON 基线 (--save)，之后的运行与基线比较 (--baseline)，
+吞吐量下降或峰值内存上升超过 --tolerance 时以非零状态退出。
+
+用法:
+    python benchmarks/bench_import.py
+    python benchmarks/bench_import.py --days 3650 --devices 2
+    python benchmarks/bench_import.py --save benchmarks/baselines/import.json
+"""
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date
+
+import click
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from generate_export import generate_export  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(ROOT, 'benchmarks', 'baselines', 'import.json')
+# 合成数据的截止日期固定，保证每次生成的文件完全相同
+EXPORT_END = date(2025, 1, 1)
+
+
+def _db_size(db_path):
+    return sum(os.path.getsize(db_path + suffix) for suffix in ('', '-wal') if os.path.exists(db_path + suffix))
+
+
+def _measure(filepath, db_path, queue):
+    """在子进程中导入一个文件，把测量结果放入 queue。峰值 RSS 只包含这个子进程自身。"""
+    import database
+    import importer
+
+    database.configure(db_path)
+    _, parser, writer = importer.detect_parser(os.path.basename(filepath))
+    conn = database.create_connection()
+    size_before = _db_size(db_path)
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    state = {}
+    started = time.perf_counter()
+    rows_processed, rows_inserted = writer(conn, parser(filepath, state=state))
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    seconds = time.perf_counter() - started
+    conn.close()
+
+    # Linux 上 ru_maxrss 以 KB 为单位，macOS 上以字节为单位
+    unit = 1 if sys.platform == 'darwin' else 1024
+    queue.put({
+        'csv_rows': state.get('rows_read', 0),
+        'metrics_parsed': rows_processed,
+        'metrics_inserted': rows_inserted,
+        'seconds': round(seconds, 3),
+        'csv_rows_per_sec': round(state.get('rows_read', 0) / seconds),
+        'metrics_per_sec': round(rows_processed / seconds),
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unit / 1024 / 1024, 1),
+        'import_rss_growth_mb': round((resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before)
+                                      * unit / 1024 / 1024, 1),
+        'db_growth_mb': round((_db_size(db_path) - size_before) / 1024 / 1024, 2),
+    })
+
+
+def run_benchmark(days, devices, duplicate_ratio):
+    """生成合成导出并逐个文件测量，返回 {文件类型: 结果}。"""
+    results = {}
+    context = multiprocessing.get_context('spawn')  # 每次测量都从干净的进程开始，峰值 RSS 互不影响
+    with tempfile.TemporaryDirectory() as tmp:
+        files = generate_export(os.path.join(tmp, 'export'), days, devices, duplicate_ratio, seed=0, end=EXPORT_END)
+        for filepath in files:
+            db_path = os.path.join(tmp, 'emanager.db')
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(db_path + suffix):
+                    os.unlink(db_path + suffix)
+            subprocess.run([sys.executable, os.path.join(ROOT, 'emanager.py'), '--db', db_path, 'init'],
+                           check=True, capture_output=True)
+
+            queue = context.Queue()
+            process = context.Process(target=_measure, args=(filepath, db_path, queue))
+            process.start()
+            result = queue.get()
+            process.join()
+            kind = 'aggregated' if 'aggregated' in filepath else 'sport_record'
+            results[kind] = dict(result, file_mb=round(os.path.getsize(filepath) / 1024 / 1024, 2))
+    return results
+
+
+def _regressions(results, baseline, tolerance):
+    """与基线比较，返回超出容差的回归描述列表。"""
+    problems = []
+    for kind, result in results.items():
+        previous = baseline.get('results', {}).get(kind)
+        if previous is None:
+            continue
+        if result['csv_rows_per_sec'] < previous['csv_rows_per_sec'] * (1 - tolerance):
+            problems.append(f"{kind}: 吞吐量 {result['csv_rows_per_sec']:,} 行/秒，"
+                            f"基线 {previous['csv_rows_per_sec']:,} 行/秒")
+        if result['peak_rss_mb'] > previous['peak_rss_mb'] * (1 + tolerance):
+            problems.append(f"{kind}: 峰值 RSS {result['peak_rss_mb']} MB，基线 {previous['peak_rss_mb']} MB")
+    return problems
+
+
+@click.command()
+@click.option('--days', default=730, show_default=True, help='合成导出覆盖的天数。')
+@click.option('--devices', default=2, show_default=True, help='合成导出中的设备数。')
+@click.option('--duplicate-ratio', default=0.1, show_default=True, help='重复同步的行所占比例。')
+@click.option('--baseline', type=click.Path(dir_okay=False), default=DEFAULT_BASELINE, show_default=True,
+              help='与之比较的基线 JSON (不存在时跳过比较)。')
+@click.option('--save', type=click.Path(dir_okay=False), default=None, help='把本次结果保存为基线 JSON。')
+@click.option('--tolerance', default=0.2, show_default=True, help='允许的相对回归幅度。')
+def main(days, devices, duplicate_ratio, baseline, save, tolerance):
+    """测量导入合成导出文件的吞吐量、峰值内存和数据库增长。"""
+    params = {'days': days, 'devices': devices, 'duplicate_ratio': duplicate_ratio}
+    results = run_benchmark(days, devices, duplicate_ratio)
+
+    click.echo(f"参数: {params}")
+    for kind, r in results.items():
+        click.echo(
+            f"- {kind}: {r['csv_rows']:,} 行 ({r['file_mb']} MB) -> {r['metrics_parsed']:,} 条指标 "
+            f"(新增 {r['metrics_inserted']:,})，{r['seconds']} 秒\n"
+            f"    {r['csv_rows_per_sec']:>10,} 行/秒   {r['metrics_per_sec']:>10,} 指标/秒   "
+            f"峰值 RSS {r['peak_rss_mb']} MB   数据库增长 {r['db_growth_mb']} MB"
+        )
+
+    if save:
+        os.makedirs(os.path.dirname(os.path.abspath(save)), exist_ok=True)
+        with open(save, 'w', encoding='utf-8') as f:
+            json.dump({'params': params, 'python': platform.python_version(), 'machine': platform.machine(),
+                       'results': results}, f, indent=2, ensure_ascii=False)
+            f.write('\n')
+        click.echo(f"基线已保存到 {save}")
+        return
+
+    if baseline and os.path.exists(baseline):
+        with open(baseline, encoding='utf-8') as f:
+            previous = json.load(f)
+        if previous.get('params') != params:
+            click.echo(f"基线参数 {previous.get('params')} 与本次不同，跳过比较。")
+            return
+        problems = _regressions(results, previous, tolerance)
+        if problems:
+            for problem in problems:
+                click.echo(click.style(f"回归: {problem}", fg='red'), err=True)
+            sys.exit(1)
+        click.echo(click.style(f"与基线 {baseline} 相比没有超过 {tolerance:.0%} 的回归。", fg='green'))
+
+
+if __name__ == '__main__':
+    main()
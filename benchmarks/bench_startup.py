@@ -0,0 +1,85 @@
+# benchmarks/bench_startup.py
+"""
+CLI 启动时间回归基准。
+
+用 `python -X importtime` 运行一条简单命令 (默认 `emanager goal list`)，统计顶层模块的累计导入耗时。
+以下任一情况以非零状态退出:
+  * 导入耗时 (多次运行取中位数) 超过 --budget-ms；
+  * 导入了 pandas / matplotlib / seaborn 等只有分析和绘图命令才需要的重型依赖。
+
+用法:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --budget-ms 150 --runs 7 -- start 1 "Deep Work"
+"""
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import click
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("pandas", "matplotlib", "seaborn", "numpy")
+
+
+def run_once(args, db_path):
+    """运行一次 CLI，返回 (墙钟耗时毫秒, 顶层导入耗时毫秒, 已导入模块集合)。"""
+    cmd = [sys.executable, "-X", "importtime", os.path.join(ROOT, "emanager.py"), "--db", db_path, *args]
+    started = time.perf_counter()
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    wall_ms = (time.perf_counter() - started) * 1000
+    if result.returncode != 0:
+        raise click.ClickException(f"命令失败 ({result.returncode}): {result.stderr.strip()[-500:]}")
+
+    import_us = 0
+    modules = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue  # 表头行
+        modules.add(name.strip())
+        # 没有缩进的是顶层导入，其累计时间已包含所有子模块
+        if not name[1:].startswith(" "):
+            import_us += int(cumulative)
+    return wall_ms, import_us / 1000, modules
+
+
+@click.command()
+@click.option("--budget-ms", default=200.0, show_default=True, help="顶层导入耗时上限 (毫秒)。")
+@click.option("--runs", default=5, show_default=True, help="运行次数，取中位数。")
+@click.argument("args", nargs=-1)
+def main(budget_ms, runs, args):
+    """测量 emanager 命令的启动开销 (默认命令: goal list)。"""
+    args = args or ("goal", "list")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "emanager.db")
+        subprocess.run([sys.executable, os.path.join(ROOT, "emanager.py"), "--db", db_path, "init"],
+                       check=True, capture_output=True)
+        results = [run_once(args, db_path) for _ in range(runs)]
+
+    wall_ms = statistics.median(r[0] for r in results)
+    import_ms = statistics.median(r[1] for r in results)
+    heavy = sorted(m for m in results[-1][2] if m.split(".")[0] in HEAVY_MODULES and "." not in m)
+
+    click.echo(f"命令: emanager {' '.join(args)}")
+    click.echo(f"  墙钟耗时中位数: {wall_ms:8.1f} ms")
+    click.echo(f"  导入耗时中位数: {import_ms:8.1f} ms (预算 {budget_ms:.0f} ms)")
+    click.echo(f"  重型依赖: {', '.join(heavy) if heavy else '无'}")
+
+    failed = False
+    if import_ms > budget_ms:
+        click.echo("失败: 导入耗时超出预算。", err=True)
+        failed = True
+    if heavy:
+        click.echo("失败: 简单命令不应导入重型依赖，请改为在函数内部延迟导入。", err=True)
+        failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
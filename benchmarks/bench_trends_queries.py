@@ -0,0 +1,105 @@
+# benchmarks/bench_trends_queries.py
+"""
+/api/trends 查询次数回归基准。
+
+在临时目录中生成合成数据，统计 /api/trends?days=N 单次请求执行的 SQL 语句数量和耗时。
+语句数量必须与 days 无关 (不能退化为每天一次查询的 N+1 模式)，否则以非零状态退出。
+
+用法:
+    python benchmarks/bench_trends_queries.py
+    python benchmarks/bench_trends_queries.py --history-days 730 --days 7 --days 90 --days 365
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import click
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import database  # noqa: E402
+
+
+def seed_database(conn, history_days):
+    """写入 history_days 天的合成事件和健康指标。"""
+    database.create_tables(conn)
+    database.migrate_db(conn)
+    database.add_goal(conn, "Bench Goal", 1, -5)
+
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    metrics = []
+    for offset in range(history_days):
+        day = today - timedelta(days=offset)
+        for hour, state in ((9, "Growth"), (14, "Consumption"), (20, "Abundance")):
+            database.insert_event(conn, {
+                "timestamp_start": (day + timedelta(hours=hour)).isoformat(),
+                "duration_minutes": 30,
+                "activity": f"bench-{state}",
+                "goal_id": 1,
+                "physical_score": 5,
+                "mental_score": 5,
+                "emotional_score": 5,
+                "key_state": state,
+                "notes": "",
+            })
+        metrics.extend([
+            (day, 'sleep_score', 70 + offset % 20, None),
+            (day, 'sleep_total_min', 400 + offset % 60, None),
+            (day, 'rhr_avg', 58 + offset % 8, None),
+            (day, 'stress_avg', 25 + offset % 15, None),
+            (day, 'steps_total', 5000 + offset * 7 % 5000, None),
+        ])
+    database.insert_health_metrics_batch(conn, metrics)
+
+
+def count_queries(client, url):
+    """执行一次请求，返回 (SQL 语句数, 耗时毫秒, 返回行数)。"""
+    statements = []
+    # 测试客户端在当前线程处理请求，因此请求使用的就是本线程的池化连接
+    conn = database.get_pooled_connection()
+    conn.set_trace_callback(statements.append)
+    try:
+        start = time.perf_counter()
+        response = client.get(url)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+    finally:
+        conn.set_trace_callback(None)
+
+    if response.status_code != 200:
+        raise click.ClickException(f"{url} 返回 {response.status_code}")
+    return len(statements), elapsed_ms, len(response.get_json())
+
+
+@click.command()
+@click.option('--history-days', default=400, type=int, help='合成数据覆盖的天数 (默认: 400)')
+@click.option('--days', 'days_list', multiple=True, type=int, help='要测试的 days 参数，可重复 (默认: 7 30 90 365)')
+def main(history_days, days_list):
+    """断言 /api/trends 的查询次数不随 days 增长。"""
+    days_list = days_list or (7, 30, 90, 365)
+
+    workdir = tempfile.mkdtemp(prefix="emanager-bench-")
+    database.configure(os.path.join(workdir, "emanager.db"))
+
+    conn = database.create_connection()
+    seed_database(conn, history_days)
+    conn.close()
+
+    import web_server
+    client = web_server.app.test_client()
+
+    click.echo(f"{'days':>6} {'rows':>6} {'queries':>8} {'ms':>9}")
+    counts = set()
+    for days in days_list:
+        queries, elapsed_ms, rows = count_queries(client, f"/api/trends?days={days}")
+        counts.add(queries)
+        click.echo(f"{days:>6} {rows:>6} {queries:>8} {elapsed_ms:>9.1f}")
+
+    if len(counts) != 1:
+        click.echo(click.style("失败: /api/trends 的查询次数随 days 变化 (N+1 回归)。", fg="red"), err=True)
+        sys.exit(1)
+    click.echo(click.style(f"通过: 每次请求固定 {counts.pop()} 条 SQL 语句。", fg="green"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+# benchmarks/generate_export.py
+"""
+生成合成的小米运动健康导出文件，用于导入性能测试。
+
+写出与真实导出格式相同的两个文件 (列、Tag/Key 组合和 JSON 结构均照 mifitdata/ 中的样本):
+  <日期>_<uid>_MiFitness_hlth_center_aggregated_fitness_data.csv  每天每台设备一组 daily_report / daily_mark / daily_fitness 行
+  <日期>_<uid>_MiFitness_hlth_center_sport_record.csv             每天每台设备 0~2 条运动记录
+
+规模参数:
+  --days             覆盖的天数；
+  --devices          设备数，每台设备各自上报一份 (同一天、同一指标的数据在导入时会按 UNIQUE 约束去重)；
+  --duplicate-ratio  额外重复写出的行所占比例 (模拟同一条记录被多次同步，UpdateTime 更晚、内容相同)。
+
+用法:
+    python benchmarks/generate_export.py /tmp/export --days 3650 --devices 2 --duplicate-ratio 0.2
+"""
+import csv
+import json
+import os
+import random
+from datetime import date, datetime, timedelta
+
+import click
+
+UID = '10000001'
+AGGREGATED_COLUMNS = ['Uid', 'Sid', 'Tag', 'Key', 'Time', 'Value', 'UpdateTime']
+SPORT_COLUMNS = ['Uid', 'Sid', 'Key', 'Time', 'Category', 'Value', 'UpdateTime']
+SPORT_TYPES = [('outdoor_walking', 'walking', 2), ('outdoor_running', 'running', 1), ('indoor_running', 'running', 3)]
+DAILY_MARK_KEYS = ['steps', 'heart_rate', 'calories', 'valid_stand', 'vitality', 'sleep', 'intensity', 'stress']
+
+
+def _json(value):
+    return json.dumps(value, separators=(',', ':'))
+
+
+def _daily_reports(rng, day_ts):
+    """一天的 (Tag, Key, Value) 列表，数值范围参照真实导出。"""
+    steps = rng.randint(800, 18000)
+    calories = rng.randint(60, 900)
+    intensity = rng.randint(0, 90)
+    deep, light, rem, awake = rng.randint(40, 130), rng.randint(150, 320), rng.randint(30, 120), rng.randint(0, 40)
+    total = deep + light + rem
+    hr_min, hr_max = rng.randint(45, 65), rng.randint(110, 175)
+    wake_up = day_ts + rng.randint(6 * 3600, 9 * 3600)
+    rows = [
+        ('daily_report', 'steps', {'calories': calories // 3, 'distance': int(steps * 0.7), 'steps': steps, 'goal': 6000}),
+        ('daily_report', 'calories', {'calories': calories, 'goal': 500}),
+        ('daily_report', 'heart_rate', {
+            'warm_up_hr_zone_duration': rng.randint(0, 40), 'min_hr': hr_min,
+            'extreme_hr_zone_duration': rng.randint(0, 3), 'avg_hr': rng.randint(65, 90),
+            'latest_hr': {'time': day_ts + 86000, 'bpm': rng.randint(60, 95)},
+            'abnormal_hr_count': 0, 'anaerobic_hr_zone_duration': rng.randint(0, 10), 'max_hr': hr_max,
+            'aerobic_hr_zone_duration': rng.randint(0, 30), 'avg_rhr': rng.randint(52, 72),
+            'fat_burning_hr_zone_duration': rng.randint(0, 60),
+        }),
+        ('daily_report', 'valid_stand', {'count': rng.randint(0, 14)}),
+        ('daily_report', 'intensity', {'duration': intensity}),
+        ('daily_report', 'sleep', {
+            'sleep_score': rng.randint(50, 95), 'sleep_manually_duration': 0, 'sleep_nap_duration': 0,
+            'max_hr': rng.randint(65, 85), 'sleep_awake_duration': awake, 'sleep_deep_duration': deep,
+            'min_hr': rng.randint(42, 55), 'breath_quality': 0, 'day_sleep_evaluation': 0,
+            'total_turn_over': 0, 'total_duration': total, 'avg_hr': rng.randint(50, 62),
+            'total_body_move': 0, 'total_snore_disturb': 0, 'awake_count': rng.randint(0, 4),
+            'avg_spo2': rng.choice([0, rng.randint(93, 99)]), 'long_sleep_evaluation': rng.randint(1, 9),
+            'total_snore': 0, 'sleep_trace_duration': 0, 'total_long_duration': total,
+            'sleep_rem_duration': rem, 'sleep_light_duration': light,
+            'segment_details': [{
+                'duration': total, 'avg_hr': rng.randint(50, 62), 'wake_up_time': wake_up,
+                'sleep_rem_duration': rem, 'sleep_awake_duration': awake, 'min_hr': hr_min,
+                'bedtime': wake_up - (total + awake) * 60, 'max_hr': rng.randint(65, 85),
+                'sleep_light_duration': light, 'timezone': 32, 'sleep_deep_duration': deep,
+                'awake_count': rng.randint(0, 4),
+            }],
+        }),
+        ('daily_fitness', 'goal', {
+            'goal_items': [
+                {'target_value': 6000, 'field': 1, 'achieved_value': steps},
+                {'target_value': 500, 'field': 2, 'achieved_value': calories},
+                {'target_value': 30, 'field': 4, 'achieved_value': intensity},
+            ],
+            'date_time': day_ts,
+        }),
+    ]
+    if rng.random() < 0.3:  # 只有部分天佩戴时测了压力
+        stress = sorted(rng.randint(10, 80) for _ in range(3))
+        rows.append(('daily_report', 'stress', {
+            'max_stress': stress[2], 'min_stress': stress[0], 'avg_stress': stress[1],
+            'stress_scale': {'moderate': 0, 'relax': 0, 'mild': 1, 'severe': 0},
+        }))
+    rows.extend(('daily_mark', key, {'has_data': True}) for key in DAILY_MARK_KEYS)
+    return rows
+
+
+def _sport_record(rng, day_ts, device):
+    start = day_ts + rng.randint(6 * 3600, 21 * 3600)
+    duration = rng.randint(900, 5400)
+    key, category, sport_type = rng.choice(SPORT_TYPES)
+    zones = [rng.randint(0, duration // 3) for _ in range(4)]
+    distance = int(duration * rng.uniform(1.2, 3.2))
+    value = {
+        'time': start, 'train_load_level': rng.randint(1, 4), 'max_cadence': rng.randint(110, 190),
+        'duration': duration, 'hrm_warm_up_duration': zones[0], 'min_pace': rng.randint(600, 1500),
+        'target_value': {}, 'max_pace': rng.randint(300, 500), 'aerobic_train_effect_level': rng.randint(1, 4),
+        'valid_duration': duration, 'end_time': start + duration, 'corrected_distance': distance,
+        'calories': duration // 10, 'did': device, 'recover_time': rng.randint(0, 48),
+        'total_cal': duration // 8, 'min_hrm': rng.randint(60, 100), 'proto_type': 3, 'timezone': 32,
+        'start_time': start, 'sport_type': sport_type, 'distance': distance, 'cloud_course_source': 0,
+        'max_hrm': rng.randint(130, 185), 'train_effect': round(rng.uniform(0.5, 4.0), 1),
+        'hrm_extreme_duration': zones[3], 'steps': int(distance * 1.3), 'avg_hrm': rng.randint(95, 160),
+        'hrm_fat_burning_duration': zones[1], 'vitality': rng.randint(0, 30), 'version': 9,
+        'train_load': rng.randint(5, 120), 'hrm_anaerobic_duration': zones[2], 'hrm_aerobic_duration': zones[2],
+    }
+    return key, category, start, value, start + duration + rng.randint(60, 3600)
+
+
+def _write(path, columns, rows, duplicate_ratio, rng):
+    """写出 CSV；按 duplicate_ratio 随机挑选行再追加一次 (UpdateTime 后移，内容不变)。"""
+    duplicates = [dict(row, UpdateTime=row['UpdateTime'] + rng.randint(60, 86400))
+                  for row in rows if rng.random() < duplicate_ratio]
+    rows = rows + duplicates
+    rows.sort(key=lambda row: row['UpdateTime'])
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(rows)
+    return len(rows)
+
+
+def generate_export(directory, days=365, devices=1, duplicate_ratio=0.1, seed=0, end=None):
+    """
+    在 directory 中生成一份合成导出，返回 {文件路径: 数据行数}。
+    数据覆盖截至 end (默认今天) 的 days 天；相同参数和 seed 总是生成相同的文件。
+    """
+    rng = random.Random(seed)
+    end = end or date.today()
+    os.makedirs(directory, exist_ok=True)
+    device_ids = ['default'] + [str(786882759 + i) for i in range(1, devices)]
+
+    aggregated, sports = [], []
+    for offset in range(days, 0, -1):
+        day = end - timedelta(days=offset)
+        day_ts = int(datetime(day.year, day.month, day.day).timestamp())
+        for device in device_ids:
+            for tag, key, value in _daily_reports(rng, day_ts):
+                aggregated.append({'Uid': UID, 'Sid': device, 'Tag': tag, 'Key': key, 'Time': day_ts,
+                                   'Value': _json(value), 'UpdateTime': day_ts + rng.randint(3600, 2 * 86400)})
+            for _ in range(rng.choice([0, 0, 1, 1, 2])):
+                key, category, start, value, updated = _sport_record(rng, day_ts, device)
+                sports.append({'Uid': UID, 'Sid': device, 'Key': key, 'Time': start, 'Category': category,
+                               'Value': _json(value), 'UpdateTime': updated})
+
+    prefix = f"{end:%Y%m%d}_{UID}_MiFitness_hlth_center"
+    aggregated_path = os.path.join(directory, f"{prefix}_aggregated_fitness_data.csv")
+    sport_path = os.path.join(directory, f"{prefix}_sport_record.csv")
+    return {
+        aggregated_path: _write(aggregated_path, AGGREGATED_COLUMNS, aggregated, duplicate_ratio, rng),
+        sport_path: _write(sport_path, SPORT_COLUMNS, sports, duplicate_ratio, rng),
+    }
+
+
+@click.command()
+@click.argument('directory', type=click.Path(file_okay=False))
+@click.option('--days', default=365, show_default=True, help='覆盖的天数。')
+@click.option('--devices', default=1, show_default=True, help='上报数据的设备数。')
+@click.option('--duplicate-ratio', default=0.1, show_default=True, help='重复同步的行所占比例 (0~1)。')
+@click.option('--seed', default=0, show_default=True, help='随机种子。')
+def main(directory, days, devices, duplicate_ratio, seed):
+    """在 DIRECTORY 中生成合成的小米运动健康导出文件。"""
+    for path, rows in generate_export(directory, days, devices, duplicate_ratio, seed).items():
+        click.echo(f"{path}: {rows} 行, {os.path.getsize(path) / 1024 / 1024:.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
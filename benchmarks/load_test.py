@@ -0,0 +1,248 @@
+# benchmarks/load_test.py
+"""
+Web API 本地压测。
+
+在临时目录中生成一个带合成数据的数据库，用 `emanager serve` (waitress) 在 127.0.0.1 的空闲端口上启动服务，
+然后由 N 个并发客户端 (每个客户端一个 keep-alive 连接) 按权重随机请求以下路由:
+
+  events_today  GET  /api/events/today
+  trends        GET  /api/trends?days=90
+  report        GET  /api/report
+  plan          GET  /api/plan
+  post_event    POST /api/events
+
+报告总吞吐量以及每个路由的请求数、错误数和 p50 / p95 / p99 延迟。
+指定 --max-p95-ms / --max-error-rate 时超出即以非零状态退出，可用于给服务端改动把关；
+--json-out 把结果写成 JSON 便于比较。所有流量只发往本机。
+
+用法:
+    python benchmarks/load_test.py
+    python benchmarks/load_test.py --clients 32 --duration 30 --mix events_today=5,trends=2,post_event=1
+    python benchmarks/load_test.py --max-p95-ms 200 --json-out /tmp/load.json
+"""
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import click
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import database  # noqa: E402
+from bench_trends_queries import seed_database  # noqa: E402
+
+
+def _post_event_body():
+    return json.dumps({
+        'timestamp_start': datetime.now().isoformat(timespec='seconds'),
+        'duration_minutes': 15,
+        'activity': 'load-test',
+        'goal_id': 1,
+        'physical_score': 5,
+        'mental_score': 5,
+        'emotional_score': 5,
+        'key_state': 'Growth',
+        'notes': '',
+    })
+
+
+# 路由名 -> (方法, 路径, 生成请求体的函数)
+ROUTES = {
+    'events_today': ('GET', '/api/events/today', None),
+    'trends': ('GET', '/api/trends?days=90', None),
+    'report': ('GET', '/api/report', None),
+    'plan': ('GET', '/api/plan', None),
+    'post_event': ('POST', '/api/events', _post_event_body),
+}
+DEFAULT_MIX = 'events_today=4,trends=2,report=1,plan=1,post_event=1'
+
+
+def parse_mix(text):
+    """'route=weight,...' -> {route: weight}"""
+    mix = {}
+    for item in text.split(','):
+        name, _, weight = item.partition('=')
+        name = name.strip()
+        if name not in ROUTES:
+            raise click.BadParameter(f"未知路由 {name!r}，可选: {', '.join(ROUTES)}")
+        try:
+            mix[name] = float(weight) if weight else 1.0
+        except ValueError:
+            raise click.BadParameter(f"{name} 的权重不是数字: {weight!r}")
+    if not any(mix.values()):
+        raise click.BadParameter("至少需要一个权重大于 0 的路由")
+    return mix
+
+
+def percentile(sorted_values, p):
+    """最近秩法求百分位 (sorted_values 已排序且非空)。"""
+    rank = max(int(round(p / 100 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _start_server(db_path, port, threads):
+    """启动 `emanager serve` 子进程并等待其开始响应。"""
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, 'emanager.py'), '--db', db_path, 'serve',
+         '--host', '127.0.0.1', '--port', str(port), '--threads', str(threads)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise click.ClickException(f"服务启动失败: {process.stderr.read().decode(errors='replace')[-500:]}")
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/api/goals')
+            conn.getresponse().read()
+            conn.close()
+            return process
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise click.ClickException("服务在 30 秒内没有开始响应")
+
+
+def _client(port, mix, seed, stop_at, record_after, samples):
+    """单个客户端：循环按权重挑选路由发请求，直到 stop_at；预热期 (record_after 之前) 的请求不记录。"""
+    rng = random.Random(seed)
+    names, weights = list(mix), list(mix.values())
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    while time.monotonic() < stop_at:
+        name = rng.choices(names, weights)[0]
+        method, path, make_body = ROUTES[name]
+        body = make_body() if make_body else None
+        headers = {'Content-Type': 'application/json'} if body else {}
+        started = time.monotonic()
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+            size = len(response.read())
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            status, size = None, 0
+        finished = time.monotonic()
+        if started >= record_after:
+            samples.append((name, (finished - started) * 1000, status, size))
+    conn.close()
+
+
+def run_load(port, clients, duration, warmup, mix, seed):
+    """运行压测，返回 (样本列表, 计时秒数)。样本为 (路由, 延迟毫秒, 状态码, 响应字节数)。"""
+    samples = []  # list.append 在多线程下是原子的
+    record_after = time.monotonic() + warmup
+    stop_at = record_after + duration
+    workers = [
+        threading.Thread(target=_client, args=(port, mix, seed + i, stop_at, record_after, samples), daemon=True)
+        for i in range(clients)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return samples, duration
+
+
+def summarize(samples, seconds):
+    """按路由汇总样本，返回 {'total': {...}, 'routes': {路由: {...}}}。"""
+    def stats(group):
+        latencies = sorted(latency for _, latency, _, _ in group)
+        errors = sum(1 for _, _, status, _ in group if status is None or status >= 400)
+        result = {'requests': len(group), 'errors': errors, 'rps': round(len(group) / seconds, 1)}
+        if latencies:
+            result.update({
+                'p50_ms': round(percentile(latencies, 50), 2),
+                'p95_ms': round(percentile(latencies, 95), 2),
+                'p99_ms': round(percentile(latencies, 99), 2),
+                'max_ms': round(latencies[-1], 2),
+                'avg_bytes': round(sum(size for _, _, _, size in group) / len(group)),
+            })
+        return result
+
+    routes = {}
+    for sample in samples:
+        routes.setdefault(sample[0], []).append(sample)
+    return {'total': stats(samples), 'routes': {name: stats(group) for name, group in sorted(routes.items())}}
+
+
+@click.command()
+@click.option('--clients', default=8, show_default=True, help='并发客户端数。')
+@click.option('--duration', default=15.0, show_default=True, help='计入统计的压测时长 (秒)。')
+@click.option('--warmup', default=2.0, show_default=True, help='预热时长 (秒)，期间的请求不计入统计。')
+@click.option('--mix', default=DEFAULT_MIX, show_default=True, help='路由权重，格式 route=weight,...')
+@click.option('--history-days', default=365, show_default=True, help='种子数据覆盖的天数。')
+@click.option('--server-threads', default=8, show_default=True, help='服务端线程数 (serve --threads)。')
+@click.option('--seed', default=0, show_default=True, help='客户端随机种子。')
+@click.option('--max-p95-ms', default=None, type=float, help='任一路由 p95 超过此值时失败。')
+@click.option('--max-error-rate', default=0.0, show_default=True, help='错误请求占比超过此值时失败。')
+@click.option('--json-out', type=click.Path(dir_okay=False), default=None, help='把结果写入 JSON 文件。')
+def main(clients, duration, warmup, mix, history_days, server_threads, seed, max_p95_ms, max_error_rate,
+         json_out):
+    """在本机对 Web API 做并发压测并报告各路由的延迟百分位。"""
+    mix = parse_mix(mix)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'emanager.db')
+        database.configure(db_path)
+        conn = database.create_connection()
+        seed_database(conn, history_days)
+        database.ensure_schema(conn, force=True)
+        conn.close()
+
+        port = _free_port()
+        server = _start_server(db_path, port, server_threads)
+        try:
+            click.echo(f"压测 http://127.0.0.1:{port}: {clients} 个客户端, 预热 {warmup:g} 秒 + {duration:g} 秒")
+            samples, seconds = run_load(port, clients, duration, warmup, mix, seed)
+        finally:
+            server.terminate()
+            server.wait(timeout=10)
+
+    summary = summarize(samples, seconds)
+    total = summary['total']
+    click.echo(f"\n总计: {total['requests']} 个请求, {total['rps']} 请求/秒, 错误 {total['errors']}")
+    click.echo(f"{'route':<14}{'requests':>10}{'req/s':>10}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, r in summary['routes'].items():
+        click.echo(f"{name:<14}{r['requests']:>10}{r['rps']:>10}{r['errors']:>8}"
+                   f"{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}{r['max_ms']:>10}")
+
+    if json_out:
+        with open(json_out, 'w', encoding='utf-8') as f:
+            json.dump({'params': {'clients': clients, 'duration': duration, 'mix': mix,
+                                  'history_days': history_days, 'server_threads': server_threads},
+                       **summary}, f, indent=2)
+            f.write('\n')
+
+    failures = []
+    if total['requests'] == 0:
+        failures.append("没有完成任何请求")
+    elif total['errors'] / total['requests'] > max_error_rate:
+        failures.append(f"错误率 {total['errors'] / total['requests']:.2%} 超过 {max_error_rate:.2%}")
+    if max_p95_ms is not None:
+        failures.extend(f"{name} 的 p95 {r['p95_ms']} ms 超过 {max_p95_ms:g} ms"
+                        for name, r in summary['routes'].items() if r['p95_ms'] > max_p95_ms)
+    if failures:
+        for failure in failures:
+            click.echo(click.style(f"失败: {failure}", fg='red'), err=True)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
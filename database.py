@@ -1,13 +1,188 @@
 
 # database.py
 import sqlite3
+import functools
+import hashlib
+import os
+import threading
+import time
 import click
+from datetime import date, datetime, timedelta
+from itertools import islice
 
-def create_connection():
-    """Creates a database connection."""
-    conn = sqlite3.connect("emanager.db")
+# --- 连接管理 ---
+# 数据库路径：默认是当前目录下的 emanager.db，可通过环境变量 EMANAGER_DB 或 configure() 修改
+DB_PATH = os.environ.get("EMANAGER_DB", "emanager.db")
+
+# 每个新连接都会执行的 PRAGMA
+CONNECTION_PRAGMAS = {
+    "journal_mode": "WAL",      # 读写并发：读者不会被写者阻塞
+    "synchronous": "NORMAL",    # WAL 模式下足够安全，提交时少一次 fsync
+    "busy_timeout": 5000,       # 遇到锁时最多等待 5 秒，而不是立即报 "database is locked"
+    "cache_size": -16000,       # 页缓存约 16 MB (负数表示 KiB)
+    "mmap_size": 268435456,     # 256 MB 内存映射读取
+    "temp_store": "MEMORY",
+}
+
+def configure(db_path):
+    """修改数据库路径。之后新建或从连接池取出的连接都使用新路径。"""
+    global DB_PATH
+    DB_PATH = db_path
+
+# --- 查询统计 ---
+# Web 服务为每个请求统计执行的 SQL 语句数和耗时 (/api/_metrics 和 Server-Timing 响应头)。
+# 语句数和耗时都由下面的连接/游标子类记录：每次 execute/executemany 调用计一条语句 (executemany 不按行计)，
+# 耗时包含 execute 和 fetch*，即包含 SQLite 逐行返回结果的时间。
+# 统计按线程记录；未调用 begin_query_stats() 的线程 (CLI) 每次调用多一层 Python 包装和一次属性查找。
+_query_stats = threading.local()
+
+def begin_query_stats():
+    """开始统计当前线程接下来执行的 SQL。"""
+    _query_stats.current = {"queries": 0, "seconds": 0.0}
+
+def end_query_stats():
+    """结束统计，返回 {'queries': 语句数, 'seconds': SQL 耗时}。"""
+    stats = getattr(_query_stats, "current", None)
+    _query_stats.current = None
+    return stats or {"queries": 0, "seconds": 0.0}
+
+def _timed(method, counts=False):
+    """包装游标方法：统计开启时累计耗时；counts=True 的方法 (execute/executemany) 每次调用再计一条语句。"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        stats = getattr(_query_stats, "current", None)
+        if stats is None:
+            return method(self, *args, **kwargs)
+        if counts:
+            stats["queries"] += 1
+        started = time.perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            stats["seconds"] += time.perf_counter() - started
+    return wrapper
+
+class TimedCursor(sqlite3.Cursor):
+    execute = _timed(sqlite3.Cursor.execute, counts=True)
+    executemany = _timed(sqlite3.Cursor.executemany, counts=True)
+    fetchone = _timed(sqlite3.Cursor.fetchone)
+    fetchmany = _timed(sqlite3.Cursor.fetchmany)
+    fetchall = _timed(sqlite3.Cursor.fetchall)
+
+class TimedConnection(sqlite3.Connection):
+    """所有游标都是 TimedCursor；Connection.execute 等快捷方法不经过 cursor()，这里改为显式创建游标。"""
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, parameters):
+        return self.cursor().executemany(sql, parameters)
+# --- 查询统计结束 ---
+
+# 本进程已检查过表结构的数据库路径
+_schema_checked = set()
+_schema_lock = threading.Lock()
+
+def create_connection(check_schema=True):
+    """
+    Creates a database connection.
+    本进程第一次连接某个数据库路径时先调用 ensure_schema()，旧数据库 (包括从未运行过 init 的) 自动建表和迁移；
+    之后的连接不再检查。自己调用 ensure_schema 的代码 (init / serve) 传 check_schema=False。
+    """
+    conn = sqlite3.connect(DB_PATH, factory=TimedConnection)
+    for name, value in CONNECTION_PRAGMAS.items():
+        conn.execute(f"PRAGMA {name} = {value}")
+    if check_schema and DB_PATH not in _schema_checked:
+        with _schema_lock:
+            if DB_PATH not in _schema_checked:
+                ensure_schema(conn)
+                _schema_checked.add(DB_PATH)
     return conn
 
+# 每个线程复用一个连接 (sqlite3 连接默认不能跨线程使用)
+_pool = threading.local()
+
+def get_pooled_connection():
+    """返回当前线程复用的连接；第一次调用或数据库路径变化时新建。"""
+    conn = getattr(_pool, "conn", None)
+    if conn is None or _pool.path != DB_PATH:
+        if conn is not None:
+            conn.close()
+        conn = create_connection()
+        _pool.conn = conn
+        _pool.path = DB_PATH
+    return conn
+
+def release_pooled_connection():
+    """用完连接后调用：回滚未提交的事务，连接留给本线程下次使用。"""
+    conn = getattr(_pool, "conn", None)
+    if conn is not None and conn.in_transaction:
+        conn.rollback()
+
+# PRAGMA data_version 只在“其他连接”(包括其他进程) 提交写入后才变化，
+# 所以用一个从不写入的专用探针连接来读取它；探针跨线程共享，用锁保护。
+_probe_lock = threading.Lock()
+_probe = None
+_probe_path = None
+
+def get_data_version():
+    """返回 (数据库路径, data_version)。任何连接提交写入后都会变化，可用作缓存键的一部分。"""
+    global _probe, _probe_path
+    with _probe_lock:
+        if _probe is None or _probe_path != DB_PATH:
+            if _probe is not None:
+                _probe.close()
+            _probe = sqlite3.connect(DB_PATH, check_same_thread=False)
+            _probe_path = DB_PATH
+        return _probe_path, _probe.execute("PRAGMA data_version").fetchone()[0]
+# --- 连接管理结束 ---
+
+# --- 查询层：可走索引的日期区间 ---
+# DATE(timestamp) = ? 会让 SQLite 对每一行先计算函数再比较，无法使用索引 (全表扫描)。
+# 时间戳以 ISO 字符串存储 ('YYYY-MM-DD HH:MM:SS' 或 'YYYY-MM-DDTHH:MM:SS')，
+# 所以同一天的条件可以等价地改写为半开区间 timestamp >= 'YYYY-MM-DD' AND timestamp < '次日'。
+
+def _as_date(value):
+    """将 date / datetime / 'YYYY-MM-DD' 字符串统一转换为 date。"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+def day_start(value):
+    """返回某一天的起始边界字符串，用于 `timestamp >= ?`。"""
+    return _as_date(value).isoformat()
+
+def day_bounds(start_date, end_date=None):
+    """
+    返回 [start_date, end_date] 这几天对应的半开区间边界 (start, end_exclusive)。
+    用于 `timestamp >= ? AND timestamp < ?`；end_date 为 None 时只取 start_date 当天。
+    """
+    start = _as_date(start_date)
+    end = _as_date(end_date) if end_date is not None else start
+    return start.isoformat(), (end + timedelta(days=1)).isoformat()
+# --- 查询层结束 ---
+
+# 当前表结构版本，记录在 PRAGMA user_version 中。修改 create_tables / migrate_db 时请递增。
+SCHEMA_VERSION = 7
+
+def ensure_schema(conn, force=False):
+    """
+    只在需要时建表和迁移：user_version 已是最新时只读取一个 PRAGMA 就返回。
+    force=True 时总是执行 (emanager init)。返回 True 表示执行了建表/迁移。
+    """
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version >= SCHEMA_VERSION and not force:
+        return False
+    create_tables(conn)
+    migrate_db(conn)
+    conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    conn.commit()
+    return True
+
 def migrate_db(conn):
     """Applies database migrations."""
     c = conn.cursor()
@@ -21,6 +196,87 @@ def migrate_db(conn):
         c.execute("ALTER TABLE goals ADD COLUMN energy_cost INTEGER DEFAULT 0")
         conn.commit()
 
+    # 为按日期区间的查询创建索引 (UNIQUE(timestamp, metric_type) 无法服务按 metric_type 过滤的查询)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_health_metrics_type_ts ON health_metrics (metric_type, timestamp)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_events_ts ON events (timestamp_start)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_events_goal_ts ON events (goal_id, timestamp_start)")
+    conn.commit()
+
+    # 原始记录去重：health_metrics 通过 raw_record_id 引用 raw_records，不再逐行复制 JSON
+    c.execute("PRAGMA table_info(health_metrics)")
+    metric_columns = [col[1] for col in c.fetchall()]
+    if "raw_record_id" not in metric_columns:
+        click.echo(click.style("Applying database migration: Adding 'raw_record_id' to 'health_metrics' table...", fg="yellow"))
+        c.execute("ALTER TABLE health_metrics ADD COLUMN raw_record_id INTEGER REFERENCES raw_records (record_id)")
+        conn.commit()
+    # 查找某条原始记录是否仍被引用 (清理无人引用的原始记录) 需要这个索引
+    c.execute("CREATE INDEX IF NOT EXISTS idx_health_metrics_raw_record ON health_metrics (raw_record_id)")
+    conn.commit()
+
+    c.execute("SELECT 1 FROM health_metrics WHERE value_text IS NOT NULL LIMIT 1")
+    if c.fetchone() is not None:
+        click.echo(click.style("Applying database migration: Moving 'value_text' payloads into 'raw_records' and compacting...", fg="yellow"))
+        conn.create_function("content_hash", 1, _content_hash, deterministic=True)
+        c.execute("""
+            INSERT OR IGNORE INTO raw_records (content_hash, payload)
+            SELECT DISTINCT content_hash(value_text), value_text
+            FROM health_metrics WHERE value_text IS NOT NULL
+        """)
+        c.execute("""
+            UPDATE health_metrics
+            SET raw_record_id = (
+                    SELECT record_id FROM raw_records
+                    WHERE raw_records.content_hash = content_hash(health_metrics.value_text)
+                ),
+                value_text = NULL
+            WHERE value_text IS NOT NULL
+        """)
+        conn.commit()
+        compacted = True
+    else:
+        compacted = False
+
+    # 早期版本在导入重复行时也会写入原始记录，删除这些无人引用的记录
+    orphans = _delete_orphan_raw_records(conn)
+    if orphans:
+        click.echo(click.style(f"Applying database migration: Removed {orphans} unreferenced 'raw_records' rows...", fg="yellow"))
+    conn.commit()
+    if compacted or orphans:
+        c.execute("VACUUM")
+
+    # 导入水位记录解析规则的版本 (旧记录为 NULL，下次导入时整个文件重新解析一次)
+    c.execute("PRAGMA table_info(import_state)")
+    if "parser_version" not in [col[1] for col in c.fetchall()]:
+        click.echo(click.style("Applying database migration: Adding 'parser_version' to 'import_state' table...", fg="yellow"))
+        c.execute("ALTER TABLE import_state ADD COLUMN parser_version TEXT")
+        conn.commit()
+
+    # 每日汇总表：补齐新增的指标列，并为已有数据库回填一次
+    c.execute(f"CREATE TABLE IF NOT EXISTS daily_health ({_daily_health_columns_sql()})")
+    c.execute("PRAGMA table_info(daily_health)")
+    daily_columns = [col[1] for col in c.fetchall()]
+    added_columns = [column for column in _daily_health_column_names() if column not in daily_columns]
+    for column in added_columns:
+        c.execute(f"ALTER TABLE daily_health ADD COLUMN {column} REAL")
+    c.execute("SELECT 1 FROM daily_health LIMIT 1")
+    if c.fetchone() is None or added_columns:
+        c.execute("SELECT 1 FROM health_metrics LIMIT 1")
+        if c.fetchone() is not None:
+            click.echo(click.style("Applying database migration: Building 'daily_health' rollup table...", fg="yellow"))
+            refresh_daily_health(conn)
+    conn.commit()
+
+    # 活动统计索引：为已有数据库回填一次
+    c.execute("CREATE INDEX IF NOT EXISTS idx_events_activity ON events (activity)")
+    _create_activity_stats_tables(c)
+    c.execute("SELECT 1 FROM activity_stats LIMIT 1")
+    if c.fetchone() is None:
+        c.execute("SELECT 1 FROM events LIMIT 1")
+        if c.fetchone() is not None:
+            click.echo(click.style("Applying database migration: Building 'activity_stats' index...", fg="yellow"))
+            refresh_activity_stats(conn)
+    conn.commit()
+
 def create_tables(conn):
     """Creates the goals, events, and health_metrics tables."""
     c = conn.cursor()
@@ -61,9 +317,67 @@ def create_tables(conn):
             value_numeric REAL,
             value_text TEXT,
             source TEXT DEFAULT 'MiBand',
+            raw_record_id INTEGER REFERENCES raw_records (record_id),
             UNIQUE(timestamp, metric_type)
         )
     """)
+
+    # 导入的原始 JSON 记录，按内容哈希去重后只存一份
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS raw_records (
+            record_id INTEGER PRIMARY KEY,
+            content_hash TEXT NOT NULL UNIQUE,
+            payload TEXT NOT NULL
+        )
+    """)
+
+    # 每个导入数据源的水位 (最大 UpdateTime) 和文件哈希，用于增量导入
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS import_state (
+            source TEXT PRIMARY KEY,
+            file_hash TEXT,
+            watermark INTEGER,
+            parser_version TEXT,    -- 导入时的 importer.PARSER_VERSION，不同时重新解析整个文件
+            updated_at DATETIME
+        )
+    """)
+
+    # Web 后台导入任务的状态和进度 (存在数据库中，多个服务进程都能查询)
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS import_jobs (
+            job_id TEXT PRIMARY KEY,
+            filename TEXT NOT NULL,
+            status TEXT NOT NULL,           -- queued / running / completed / skipped / failed
+            rows_total INTEGER,             -- CSV 数据行数 (估算)
+            rows_read INTEGER DEFAULT 0,    -- 已读取的 CSV 行数
+            rows_parsed INTEGER DEFAULT 0,  -- 解析出的指标记录数
+            rows_inserted INTEGER DEFAULT 0,
+            message TEXT,
+            created_at DATETIME,
+            started_at DATETIME,
+            finished_at DATETIME
+        )
+    """)
+
+    # 每日汇总表 (由 insert_health_metrics_batch 增量维护)
+    c.execute(f"CREATE TABLE IF NOT EXISTS daily_health ({_daily_health_columns_sql()})")
+
+    # 活动统计索引 (由 insert_event 增量维护)，指导和周报洞察只查这两张表，不扫描 events
+    _create_activity_stats_tables(c)
+
+    # 日内采样 (分钟级心率/步数/压力...)：每个指标每天一行，时间和数值是压缩的差分数组 (见 timeseries.py)
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS timeseries_chunks (
+            metric TEXT NOT NULL,
+            day TEXT NOT NULL,          -- 本地日期 YYYY-MM-DD
+            sample_count INTEGER NOT NULL,
+            first_ts INTEGER NOT NULL,  -- Unix 秒
+            last_ts INTEGER NOT NULL,
+            times BLOB NOT NULL,
+            vals BLOB NOT NULL,
+            PRIMARY KEY (metric, day)
+        ) WITHOUT ROWID
+    """)
     
     conn.commit()
 
@@ -121,19 +435,354 @@ def insert_event(conn, event):
         event["key_state"].encode('utf-8', 'surrogateescape').decode('utf-8'),
         event["notes"].encode('utf-8', 'surrogateescape').decode('utf-8'),
     ))
+    _add_event_to_activity_stats(c, c.lastrowid)
     conn.commit()
 
-def insert_health_metrics_batch(conn, metrics_data):
+def _content_hash(payload):
+    """原始记录的内容哈希，用于 raw_records 去重。"""
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+def _store_raw_records(conn, payloads):
     """
-    Inserts a batch of health metrics into the database.
+    将一组原始 JSON 文本写入 raw_records (已存在的内容会被忽略)。
+    返回 {payload: record_id}。
+    """
+    hashes = {payload: _content_hash(payload) for payload in payloads}
+    c = conn.cursor()
+    c.executemany(
+        "INSERT OR IGNORE INTO raw_records (content_hash, payload) VALUES (?, ?)",
+        [(content_hash, payload) for payload, content_hash in hashes.items()]
+    )
+
+    ids_by_hash = {}
+    hash_list = list(hashes.values())
+    for i in range(0, len(hash_list), 500):  # 受 SQLite 参数数量上限约束，分批查询
+        batch = hash_list[i:i + 500]
+        c.execute(
+            f"SELECT content_hash, record_id FROM raw_records WHERE content_hash IN ({', '.join('?' for _ in batch)})",
+            batch
+        )
+        ids_by_hash.update(c.fetchall())
+    return {payload: ids_by_hash[content_hash] for payload, content_hash in hashes.items()}
+
+def _delete_orphan_raw_records(conn, record_ids=None):
+    """
+    删除没有被任何 health_metrics 行引用的 raw_records (重复行被 INSERT OR IGNORE 忽略后，它们的原始记录无人引用)。
+    record_ids 为 None 时检查全表。依赖 idx_health_metrics_raw_record 索引。返回删除的行数。
+    """
+    c = conn.cursor()
+    orphan_sql = """
+        DELETE FROM raw_records
+        WHERE NOT EXISTS (SELECT 1 FROM health_metrics WHERE raw_record_id = raw_records.record_id) {where}
+    """
+    if record_ids is None:
+        c.execute(orphan_sql.format(where=""))
+        return c.rowcount
+
+    deleted = 0
+    id_list = list(record_ids)
+    for i in range(0, len(id_list), 500):  # 受 SQLite 参数数量上限约束，分批删除
+        batch = id_list[i:i + 500]
+        c.execute(orphan_sql.format(where=f"AND record_id IN ({', '.join('?' for _ in batch)})"), batch)
+        deleted += c.rowcount
+    return deleted
+
+def _write_health_metrics_chunk(conn, chunk):
+    """
+    写入一块健康指标并刷新对应日期的 daily_health，返回实际新增的行数 (不提交)。
+    chunk 中每行为 (timestamp, metric_type, value_numeric, raw_payload)，
+    raw_payload 只在 raw_records 中保存一份，health_metrics 行通过 raw_record_id 引用它。
     """
+    record_ids = _store_raw_records(conn, {row[3] for row in chunk if row[3] is not None})
     c = conn.cursor()
     c.executemany("""
-        INSERT OR IGNORE INTO health_metrics (timestamp, metric_type, value_numeric, value_text)
+        INSERT OR IGNORE INTO health_metrics (timestamp, metric_type, value_numeric, raw_record_id)
         VALUES (?, ?, ?, ?)
-    """, metrics_data)
+    """, [(ts, metric_type, value, record_ids.get(payload)) for ts, metric_type, value, payload in chunk])
+    inserted = c.rowcount
+    if inserted < len(chunk):  # 有行被当作重复忽略，清理只被它们用到的原始记录
+        _delete_orphan_raw_records(conn, set(record_ids.values()))
+    refresh_daily_health(conn, {_as_date(row[0]) for row in chunk})
+    return inserted
+
+def insert_health_metrics_batch(conn, metrics_data):
+    """
+    Inserts a batch of health metrics into the database.
+    同时刷新这批数据涉及到的日期在 daily_health 中的汇总行。
+    """
+    _write_health_metrics_chunk(conn, metrics_data)
     conn.commit()
 
+def get_import_state(conn, source):
+    """返回某个导入数据源上次的 (file_hash, watermark, parser_version)，从未导入过则返回 None。"""
+    c = conn.cursor()
+    c.execute("SELECT file_hash, watermark, parser_version FROM import_state WHERE source = ?", (source,))
+    return c.fetchone()
+
+def set_import_state(conn, source, file_hash, watermark, parser_version):
+    """记录某个导入数据源本次导入后的文件哈希、水位和所用解析规则的版本。"""
+    c = conn.cursor()
+    c.execute("""
+        INSERT OR REPLACE INTO import_state (source, file_hash, watermark, parser_version, updated_at)
+        VALUES (?, ?, ?, ?, ?)
+    """, (source, file_hash, watermark, parser_version, datetime.now().isoformat()))
+    conn.commit()
+
+IMPORT_JOB_COLUMNS = [
+    'job_id', 'filename', 'status', 'rows_total', 'rows_read', 'rows_parsed', 'rows_inserted',
+    'message', 'created_at', 'started_at', 'finished_at',
+]
+
+def create_import_job(conn, job_id, filename):
+    """登记一个排队中的导入任务。"""
+    c = conn.cursor()
+    c.execute("""
+        INSERT INTO import_jobs (job_id, filename, status, created_at)
+        VALUES (?, ?, 'queued', ?)
+    """, (job_id, filename, datetime.now().isoformat()))
+    conn.commit()
+
+def update_import_job(conn, job_id, **fields):
+    """更新导入任务的状态/进度字段 (字段名必须在 IMPORT_JOB_COLUMNS 中)。"""
+    for name in fields:
+        if name not in IMPORT_JOB_COLUMNS:
+            raise ValueError(f"Unknown import job field: {name}")
+    assignments = ", ".join(f"{name} = ?" for name in fields)
+    c = conn.cursor()
+    c.execute(f"UPDATE import_jobs SET {assignments} WHERE job_id = ?", (*fields.values(), job_id))
+    conn.commit()
+
+def fail_unfinished_import_jobs(conn, message):
+    """把所有 queued / running 状态的导入任务标记为 failed，返回标记的任务数。"""
+    c = conn.cursor()
+    c.execute("""
+        UPDATE import_jobs SET status = 'failed', message = ?, finished_at = ?
+        WHERE status IN ('queued', 'running')
+    """, (message, datetime.now().isoformat()))
+    conn.commit()
+    return c.rowcount
+
+def get_import_job(conn, job_id):
+    """返回导入任务的字段字典，不存在时返回 None。"""
+    c = conn.cursor()
+    c.execute(f"SELECT {', '.join(IMPORT_JOB_COLUMNS)} FROM import_jobs WHERE job_id = ?", (job_id,))
+    row = c.fetchone()
+    return dict(zip(IMPORT_JOB_COLUMNS, row)) if row else None
+
+# 流式写入时每个事务包含的行数
+HEALTH_METRICS_CHUNK_SIZE = 5000
+
+def insert_health_metrics_stream(conn, metrics_iter, chunk_size=HEALTH_METRICS_CHUNK_SIZE, progress=None):
+    """
+    分块写入一个健康指标迭代器 (例如 importer 的解析生成器)，每块一个事务。
+    内存中最多只保留 chunk_size 行，因此峰值内存与 CSV 大小无关。
+    每块提交后调用 progress(rows_processed, rows_inserted)。
+    返回 (rows_processed, rows_inserted)；rows_inserted 不含被 UNIQUE 约束忽略的重复行。
+    """
+    iterator = iter(metrics_iter)
+    processed = 0
+    inserted = 0
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            break
+        inserted += _write_health_metrics_chunk(conn, chunk)
+        conn.commit()
+        processed += len(chunk)
+        if progress is not None:
+            progress(processed, inserted)
+    return processed, inserted
+
+
+# --- 每日汇总表 daily_health ---
+# 每天一行、每个已知指标一列，读路径只需按主键 (date) 做区间扫描，
+# 不必每次都对 health_metrics 做 GROUP BY / MAX(CASE ...) 透视。
+DAILY_HEALTH_METRICS = [
+    'sleep_score', 'sleep_total_min', 'sleep_deep_min',
+    'rhr_avg', 'heart_rate_avg', 'hr_min', 'hr_max',
+    'stress_avg', 'steps_total', 'calories_total',
+]
+# 这些指标另存一列当天所有读数的最大值 (<metric>_max)，供 emanager trend 使用 (它一直按 MAX() 汇总)
+DAILY_HEALTH_MAX_METRICS = ['sleep_score', 'sleep_total_min', 'rhr_avg', 'stress_avg']
+
+def _daily_health_column_names():
+    return DAILY_HEALTH_METRICS + [f"{metric}_max" for metric in DAILY_HEALTH_MAX_METRICS]
+
+def _daily_health_columns_sql():
+    columns = ", ".join(f"{column} REAL" for column in _daily_health_column_names())
+    return f"date TEXT PRIMARY KEY, {columns}"
+
+def _date_runs(dates):
+    """将一组日期合并为连续区间 [(start, end), ...]，以减少刷新时的语句数量。"""
+    runs = []
+    for day in sorted(dates):
+        if runs and day - runs[-1][1] == timedelta(days=1):
+            runs[-1][1] = day
+        else:
+            runs.append([day, day])
+    return runs
+
+def refresh_daily_health(conn, dates=None):
+    """
+    根据 health_metrics 重新计算 daily_health 中指定日期的汇总行。
+    每个指标列取当天最新 (timestamp 最大) 的正值，与 get_energy_assessment 的取值一致；
+    <metric>_max 列取当天所有读数的最大值。dates 为 None 时全量重建。不提交事务，由调用者 commit。
+    """
+    c = conn.cursor()
+    # 每个 (日期, 指标) 中 rn = 1 的行是最新的正值 (没有正值时是其他行，由 value_numeric > 0 排除)；
+    # 与以前一样，只有至少一个正值读数的日期才有汇总行
+    pivot = ", ".join(
+        [f"MAX(CASE WHEN metric_type = '{metric}' AND rn = 1 AND value_numeric > 0 THEN value_numeric END)"
+         for metric in DAILY_HEALTH_METRICS] +
+        [f"MAX(CASE WHEN metric_type = '{metric}' THEN value_numeric END)"
+         for metric in DAILY_HEALTH_MAX_METRICS]
+    )
+    insert_sql = f"""
+        INSERT INTO daily_health (date, {', '.join(_daily_health_column_names())})
+        SELECT day, {pivot}
+        FROM (
+            SELECT DATE(timestamp) AS day, metric_type, value_numeric,
+                   ROW_NUMBER() OVER (PARTITION BY DATE(timestamp), metric_type
+                                      ORDER BY value_numeric > 0 DESC, timestamp DESC) AS rn
+            FROM health_metrics
+            WHERE 1 = 1 {{where}}
+        )
+        GROUP BY day
+        HAVING MAX(value_numeric > 0)
+    """
+
+    if dates is None:
+        c.execute("DELETE FROM daily_health")
+        c.execute(insert_sql.format(where=""))
+        return
+
+    for start, end in _date_runs({_as_date(d) for d in dates}):
+        c.execute("DELETE FROM daily_health WHERE date >= ? AND date <= ?", (start.isoformat(), end.isoformat()))
+        c.execute(insert_sql.format(where="AND timestamp >= ? AND timestamp < ?"), day_bounds(start, end))
+
+def get_daily_health(conn, start_date, end_date=None, aggregate='latest'):
+    """
+    读取 [start_date, end_date] 的每日汇总。
+    aggregate='latest' 时每个指标取当天最新的正值；'max' 时取 DAILY_HEALTH_MAX_METRICS 当天的最大值。
+    返回 {'YYYY-MM-DD': {metric_type: value}}，只包含有值的指标。
+    """
+    if aggregate == 'max':
+        metrics = DAILY_HEALTH_MAX_METRICS
+        columns = [f"{metric}_max" for metric in metrics]
+    else:
+        metrics = columns = DAILY_HEALTH_METRICS
+    c = conn.cursor()
+    end = end_date if end_date is not None else start_date
+    c.execute(f"""
+        SELECT date, {', '.join(columns)} FROM daily_health
+        WHERE date >= ? AND date <= ?
+        ORDER BY date
+    """, (day_start(start_date), day_start(end)))
+
+    daily = {}
+    for row in c.fetchall():
+        daily[row[0]] = {
+            metric: value
+            for metric, value in zip(metrics, row[1:])
+            if value is not None
+        }
+    return daily
+# --- 每日汇总表结束 ---
+
+
+# --- 活动统计索引 ---
+# activity_stats: 每个 (活动, 状态, 目标) 的次数、总时长、最近一次和最近一次短任务的开始时间。
+# 目标的优先级不复制进来，查询时与 goals 连接，修改优先级后立即生效。
+# activity_daily_stats: 每天每个 (状态, 活动) 的次数和总时长，用于按日期区间的统计。
+# 两张表都由 insert_event 在同一事务中增量更新；直接修改 events 的代码需调用 refresh_activity_stats。
+
+# 时长不超过此值 (分钟) 的事件算作“微型任务” (recommender 的内耗指导)
+ACTIVITY_SHORT_TASK_MINUTES = 30
+
+def _create_activity_stats_tables(c):
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS activity_stats (
+            activity TEXT NOT NULL,
+            key_state TEXT NOT NULL,
+            goal_id INTEGER NOT NULL,       -- 0 = 未关联目标
+            event_count INTEGER NOT NULL,
+            total_minutes INTEGER NOT NULL,
+            last_start DATETIME,
+            last_short_start DATETIME,      -- 最近一次时长 <= ACTIVITY_SHORT_TASK_MINUTES 的事件
+            PRIMARY KEY (activity, key_state, goal_id)
+        ) WITHOUT ROWID
+    """)
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS activity_daily_stats (
+            key_state TEXT NOT NULL,
+            day TEXT NOT NULL,              -- DATE(timestamp_start)
+            activity TEXT NOT NULL,
+            event_count INTEGER NOT NULL,
+            total_minutes INTEGER NOT NULL,
+            PRIMARY KEY (key_state, day, activity)
+        ) WITHOUT ROWID
+    """)
+
+def _add_event_to_activity_stats(c, event_id):
+    """把刚插入的一条事件累加到统计表 (数值取自 events 行本身，与全量重建的结果一致)。不提交。"""
+    c.execute(f"""
+        INSERT INTO activity_stats
+            (activity, key_state, goal_id, event_count, total_minutes, last_start, last_short_start)
+        SELECT activity, key_state, COALESCE(goal_id, 0), 1, duration_minutes, timestamp_start,
+               CASE WHEN duration_minutes <= {ACTIVITY_SHORT_TASK_MINUTES} THEN timestamp_start END
+        FROM events WHERE event_id = ?
+        ON CONFLICT (activity, key_state, goal_id) DO UPDATE SET
+            event_count = event_count + 1,
+            total_minutes = total_minutes + excluded.total_minutes,
+            last_start = CASE WHEN last_start IS NULL OR excluded.last_start > last_start
+                              THEN excluded.last_start ELSE last_start END,
+            last_short_start = CASE WHEN last_short_start IS NULL OR excluded.last_short_start > last_short_start
+                                    THEN excluded.last_short_start ELSE last_short_start END
+    """, (event_id,))
+    c.execute("""
+        INSERT INTO activity_daily_stats (key_state, day, activity, event_count, total_minutes)
+        SELECT key_state, DATE(timestamp_start), activity, 1, duration_minutes
+        FROM events WHERE event_id = ? AND DATE(timestamp_start) IS NOT NULL
+        ON CONFLICT (key_state, day, activity) DO UPDATE SET
+            event_count = event_count + 1,
+            total_minutes = total_minutes + excluded.total_minutes
+    """, (event_id,))
+
+def refresh_activity_stats(conn, activities=None):
+    """
+    根据 events 重新计算指定活动在两张统计表中的所有行 (修改或删除事件之后调用)。
+    activities 为 None 时全量重建。不提交事务，由调用者 commit。
+    """
+    c = conn.cursor()
+    if activities is None:
+        where, params = "", ()
+        c.execute("DELETE FROM activity_stats")
+        c.execute("DELETE FROM activity_daily_stats")
+    else:
+        params = tuple(set(activities))
+        where = f"AND activity IN ({', '.join('?' for _ in params)})"
+        c.execute(f"DELETE FROM activity_stats WHERE 1 {where}", params)
+        c.execute(f"DELETE FROM activity_daily_stats WHERE 1 {where}", params)
+
+    c.execute(f"""
+        INSERT INTO activity_stats
+            (activity, key_state, goal_id, event_count, total_minutes, last_start, last_short_start)
+        SELECT activity, key_state, COALESCE(goal_id, 0), COUNT(*), COALESCE(SUM(duration_minutes), 0),
+               MAX(timestamp_start),
+               MAX(CASE WHEN duration_minutes <= {ACTIVITY_SHORT_TASK_MINUTES} THEN timestamp_start END)
+        FROM events
+        WHERE 1 {where}
+        GROUP BY activity, key_state, COALESCE(goal_id, 0)
+    """, params)
+    c.execute(f"""
+        INSERT INTO activity_daily_stats (key_state, day, activity, event_count, total_minutes)
+        SELECT key_state, DATE(timestamp_start), activity, COUNT(*), COALESCE(SUM(duration_minutes), 0)
+        FROM events
+        WHERE DATE(timestamp_start) IS NOT NULL {where}
+        GROUP BY key_state, DATE(timestamp_start), activity
+    """, params)
+# --- 活动统计索引结束 ---
+
 
 # (将其添加到 database.py 中，替换掉上次的 update_goal_cost)
 # (get_goal_by_id 函数 保持不变)
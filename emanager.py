@@ -3,21 +3,35 @@ import click
 import database
 from goals import goal
 from log_event import log
-from analysis import report, plan, journal, trend
+from analysis import report, plan, journal, trend, plot
 from track import start, stop
-from importer import import_data
+from importer import import_data, import_dir
+from serve import serve
 
 @click.group()
-def emanager():
+@click.option('--db', 'db_path', default=None, envvar='EMANAGER_DB',
+              help='数据库文件路径 (默认: ./emanager.db，也可通过环境变量 EMANAGER_DB 设置)')
+@click.option('--profile', 'profile_path', default=None, type=click.Path(dir_okay=False),
+              help='用 cProfile 分析子命令，写入此 .prof 文件和同名的 .collapsed 折叠栈文件。')
+@click.option('--memprofile', is_flag=True, help='用 tracemalloc 分析子命令，打印分配最多的代码位置和峰值内存。')
+@click.pass_context
+def emanager(ctx, db_path, profile_path, memprofile):
     """A personal energy manager CLI."""
-    pass
+    if db_path:
+        database.configure(db_path)
+    # 只有指定了分析选项时才加载 profiling 模块
+    if memprofile:
+        import profiling
+        profiling.start_memory_profile(ctx)
+    if profile_path:
+        import profiling
+        profiling.start_cpu_profile(ctx, profile_path)
 
 @emanager.command()
 def init():
     """Initializes the database."""
-    conn = database.create_connection()
-    database.create_tables(conn)
-    database.migrate_db(conn) # Apply migrations
+    conn = database.create_connection(check_schema=False)
+    database.ensure_schema(conn, force=True) # Create tables and apply migrations
     conn.close()
     click.echo("Database initialized and migrations applied.")
 
@@ -28,8 +42,11 @@ emanager.add_command(start)
 emanager.add_command(stop)
 emanager.add_command(plan)
 emanager.add_command(import_data)
+emanager.add_command(import_dir)
 emanager.add_command(journal)
 emanager.add_command(trend)
+emanager.add_command(plot)
+emanager.add_command(serve)
 
 
 if __name__ == "__main__":
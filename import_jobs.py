@@ -0,0 +1,123 @@
+# import_jobs.py
+"""
+Web 上传导入的后台任务。
+
+/api/import 保存上传文件后调用 submit() 立即返回任务 ID，由后台线程完成哈希检查、解析和写入。
+任务状态和进度保存在 import_jobs 表中，所以任何服务进程/线程都可以通过 get_status() 查询。
+后台只有一个工作线程：SQLite 同一时间只允许一个写者，多个导入并行写入只会互相等锁。
+"""
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import database
+from importer import PARSER_VERSION, get_previous_import
+
+# 后台任务写入每日指标时块更小，进度更新更及时 (日内采样使用 timeseries 的默认值)
+IMPORT_JOB_CHUNK_SIZE = 1000
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="import-job")
+
+
+def _count_rows(filepath):
+    """估算 CSV 数据行数 (换行数减去表头)，用于计算进度和剩余时间。"""
+    lines = 0
+    with open(filepath, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            lines += block.count(b'\n')
+    return max(lines - 1, 0)
+
+
+def submit(filepath, filename, parser, writer):
+    """
+    登记并排队一个导入任务，返回任务 ID。
+    filepath 是上传文件的临时副本，任务结束后会被删除；parser / writer 来自 importer.detect_parser。
+    """
+    job_id = uuid.uuid4().hex
+    conn = database.create_connection()
+    try:
+        database.create_import_job(conn, job_id, filename)
+    finally:
+        conn.close()
+    _executor.submit(_run, job_id, filepath, filename, parser, writer)
+    return job_id
+
+
+def fail_interrupted_jobs():
+    """
+    服务启动时调用一次 (在开始接受请求之前)：任务只在启动它的进程中运行，
+    上次进程退出时仍在排队或运行的任务不会再继续，将它们标记为失败。返回标记的任务数。
+    """
+    conn = database.create_connection()
+    try:
+        return database.fail_unfinished_import_jobs(conn, 'Import interrupted by server restart')
+    finally:
+        conn.close()
+
+
+def _run(job_id, filepath, filename, parser, writer):
+    conn = database.create_connection()
+    try:
+        database.update_import_job(conn, job_id, status='running', started_at=datetime.now().isoformat(),
+                                   rows_total=_count_rows(filepath))
+
+        # 跳过未变化的文件和上次水位之前的行
+        source, current_hash, since, unchanged = get_previous_import(conn, filepath, filename)
+        if unchanged:
+            database.update_import_job(conn, job_id, status='skipped', message='File unchanged since last import',
+                                       finished_at=datetime.now().isoformat())
+            return
+
+        state = {'watermark': since}
+
+        def record_progress(rows_parsed, rows_inserted):
+            database.update_import_job(conn, job_id, rows_read=state.get('rows_read', 0),
+                                       rows_parsed=rows_parsed, rows_inserted=rows_inserted)
+
+        options = {'chunk_size': IMPORT_JOB_CHUNK_SIZE} if writer is database.insert_health_metrics_stream else {}
+        rows_parsed, rows_inserted = writer(
+            conn, parser(filepath, since=since, state=state), progress=record_progress, **options
+        )
+        database.set_import_state(conn, source, current_hash, state['watermark'], PARSER_VERSION)
+
+        if rows_parsed == 0 and since is None:
+            status, message = 'failed', 'No valid data found in file'
+        else:
+            status, message = 'completed', f'Successfully imported {rows_parsed} health records'
+        database.update_import_job(conn, job_id, status=status, message=message,
+                                   rows_read=state.get('rows_read', 0), rows_parsed=rows_parsed,
+                                   rows_inserted=rows_inserted, finished_at=datetime.now().isoformat())
+    except Exception as e:
+        if conn.in_transaction:
+            conn.rollback()
+        database.update_import_job(conn, job_id, status='failed', message=f'Import failed: {e}',
+                                   finished_at=datetime.now().isoformat())
+    finally:
+        conn.close()
+        if os.path.exists(filepath):
+            os.unlink(filepath)
+
+
+def get_status(conn, job_id):
+    """
+    返回任务状态字典 (不存在时返回 None)，附加已跳过的重复记录数、
+    已用时间和按已读行数线性估算的剩余时间 (秒)。
+    """
+    job = database.get_import_job(conn, job_id)
+    if job is None:
+        return None
+
+    job['duplicates_skipped'] = job['rows_parsed'] - job['rows_inserted']
+    job['elapsed_seconds'] = None
+    job['eta_seconds'] = None
+    if job['started_at']:
+        end = datetime.fromisoformat(job['finished_at']) if job['finished_at'] else datetime.now()
+        elapsed = (end - datetime.fromisoformat(job['started_at'])).total_seconds()
+        job['elapsed_seconds'] = round(elapsed, 1)
+        if job['status'] == 'running' and job['rows_read'] and job['rows_total']:
+            remaining = max(job['rows_total'] - job['rows_read'], 0)
+            job['eta_seconds'] = round(elapsed / job['rows_read'] * remaining, 1)
+        elif job['finished_at']:
+            job['eta_seconds'] = 0
+    return job
@@ -2,49 +2,192 @@
 import click
 import database
 import csv
+import hashlib
 import json
+import os
+import re
+import time
 from datetime import datetime
+from itertools import islice
 
-def parse_aggregated_data(filepath):
+def _row_watermark(row):
+    """行的水位值：优先使用 UpdateTime，没有时使用 Time。"""
+    return int(row.get('UpdateTime') or row['Time'])
+
+# --- 每日指标注册表 ---
+# (Tag, Key) -> {metric_type: JSON 路径}。新增指标只需在这里加一行配置。
+# 路径语法: 'a.b' 逐层取字段；'items[field=1].value' 在列表中取第一个 field == 1 的元素。
+# 路径不存在、值为 None 或不是数字时跳过该指标。
+# (我们的导出中 vitality / vo2_max 只有 daily_mark 的 {"has_data": true} 标记，没有可导入的数值。)
+DAILY_METRICS = {
+    ('daily_report', 'sleep'): {
+        'sleep_total_min': 'total_duration',
+        'sleep_deep_min': 'sleep_deep_duration',
+        'sleep_light_min': 'sleep_light_duration',
+        'sleep_rem_min': 'sleep_rem_duration',
+        'sleep_awake_min': 'sleep_awake_duration',
+        'sleep_nap_min': 'sleep_nap_duration',
+        'sleep_score': 'sleep_score',
+        'sleep_awake_count': 'awake_count',
+        'sleep_hr_avg': 'avg_hr',
+        'sleep_hr_min': 'min_hr',
+        'sleep_hr_max': 'max_hr',
+        'sleep_spo2_avg': 'avg_spo2',
+    },
+    ('daily_report', 'heart_rate'): {
+        'rhr_avg': 'avg_rhr',
+        'heart_rate_avg': 'avg_hr',
+        'hr_min': 'min_hr',
+        'hr_max': 'max_hr',
+        'hr_latest': 'latest_hr.bpm',
+        'hr_abnormal_count': 'abnormal_hr_count',
+        'hr_zone_warm_up_min': 'warm_up_hr_zone_duration',
+        'hr_zone_fat_burning_min': 'fat_burning_hr_zone_duration',
+        'hr_zone_aerobic_min': 'aerobic_hr_zone_duration',
+        'hr_zone_anaerobic_min': 'anaerobic_hr_zone_duration',
+        'hr_zone_extreme_min': 'extreme_hr_zone_duration',
+    },
+    ('daily_report', 'steps'): {
+        'steps_total': 'steps',
+        'steps_distance_m': 'distance',
+        'steps_calories': 'calories',
+        'steps_goal': 'goal',
+    },
+    ('daily_report', 'calories'): {
+        'calories_total': 'calories',
+        'calories_goal': 'goal',
+    },
+    ('daily_report', 'stress'): {
+        'stress_avg': 'avg_stress',
+        'stress_min': 'min_stress',
+        'stress_max': 'max_stress',
+    },
+    ('daily_report', 'intensity'): {
+        'intensity_min': 'duration',
+    },
+    ('daily_report', 'valid_stand'): {
+        'valid_stand_count': 'count',
+    },
+    ('daily_fitness', 'goal'): {
+        'goal_steps_target': 'goal_items[field=1].target_value',
+        'goal_steps_achieved': 'goal_items[field=1].achieved_value',
+        'goal_calories_target': 'goal_items[field=2].target_value',
+        'goal_calories_achieved': 'goal_items[field=2].achieved_value',
+        'goal_intensity_target': 'goal_items[field=4].target_value',
+        'goal_intensity_achieved': 'goal_items[field=4].achieved_value',
+    },
+}
+
+_PATH_STEP = re.compile(r'(\w+)(?:\[(\w+)=([^\]]+)\])?')
+
+def _field_getter(name):
+    def get(obj):
+        return obj.get(name) if isinstance(obj, dict) else None
+    return get
+
+def _match_getter(key, expected):
+    def get(items):
+        if isinstance(items, list):
+            for item in items:
+                if isinstance(item, dict) and item.get(key) == expected:
+                    return item
+        return None
+    return get
+
+def _compile_path(path):
+    """把注册表中的 JSON 路径编译成取值函数；单个字段的路径直接返回字段取值函数。"""
+    getters = []
+    for part in path.split('.'):
+        match = _PATH_STEP.fullmatch(part)
+        if match is None:
+            raise ValueError(f"Invalid metric path: {path!r}")
+        name, match_key, match_value = match.groups()
+        getters.append(_field_getter(name))
+        if match_key:
+            try:
+                expected = json.loads(match_value)
+            except json.JSONDecodeError:
+                expected = match_value
+            getters.append(_match_getter(match_key, expected))
+    if len(getters) == 1:
+        return getters[0]
+
+    def get(obj):
+        for getter in getters:
+            obj = getter(obj)
+            if obj is None:
+                return None
+        return obj
+    return get
+
+def _compile_extractor(fields):
+    """把 {metric_type: 路径} 编译成一个函数：输入解码后的 JSON，返回 [(metric_type, 数值), ...]。"""
+    compiled = tuple((metric, _compile_path(path)) for metric, path in fields.items())
+
+    def extract(payload):
+        results = []
+        for metric, get in compiled:
+            value = get(payload)
+            if type(value) in (int, float):  # 排除 None / bool / 字符串 / 嵌套对象
+                results.append((metric, value))
+        return results
+    return extract
+
+# 模块加载时编译一次，导入时按 (Tag, Key) 一次字典查找即可分派
+_DAILY_EXTRACTORS = {key: _compile_extractor(fields) for key, fields in DAILY_METRICS.items()}
+# --- 每日指标注册表结束 ---
+
+def parse_aggregated_data(filepath, since=None, state=None):
     """
     [cite_start]解析 hlth_center_aggregated_fitness_data.csv  [cite: 70, 312, 377-655, 713, 700, 708, 720]
+    逐行生成 (timestamp, metric_type, value_numeric, value_text)，不在内存中保留整个文件。
+    提取哪些指标由 DAILY_METRICS 注册表决定，每行的 JSON 只解码一次；注册表中没有的行不解码。
+    since: 上次导入的水位，水位 <= since 的行直接跳过 (不做 JSON 解码)。
+    state: 可选的 dict，解析过程中把读到的最大水位写入 state['watermark']，已读取的行数写入 state['rows_read']。
     """
-    metrics = []
     with open(filepath, 'r', encoding='utf-8') as f:
         reader = csv.DictReader(f)
         for row in reader:
-            if row.get('Tag') != 'daily_report':
+            try:
+                watermark = _row_watermark(row)
+            except (ValueError, TypeError):
+                continue
+            if state is not None:
+                state['rows_read'] = state.get('rows_read', 0) + 1
+                if state.get('watermark') is None or watermark > state['watermark']:
+                    state['watermark'] = watermark
+            if since is not None and watermark <= since:
+                continue
+            extract = _DAILY_EXTRACTORS.get((row.get('Tag'), row.get('Key')))
+            if extract is None:
                 continue
             try:
                 ts = datetime.fromtimestamp(int(row['Time']))
-                key = row['Key']
-                value_json = json.loads(row['Value'])
-
-                if key == 'sleep':
-                    metrics.append((ts, 'sleep_total_min', value_json.get('total_duration'), row['Value']))
-                    metrics.append((ts, 'sleep_deep_min', value_json.get('sleep_deep_duration'), row['Value']))
-                    metrics.append((ts, 'sleep_score', value_json.get('sleep_score'), row['Value']))
-                elif key == 'steps':
-                    metrics.append((ts, 'steps_total', value_json.get('steps'), row['Value']))
-                elif key == 'calories':
-                    metrics.append((ts, 'calories_total', value_json.get('calories'), row['Value']))
-                elif key == 'stress':
-                    metrics.append((ts, 'stress_avg', value_json.get('avg_stress'), row['Value']))
-                elif key == 'heart_rate':
-                    metrics.append((ts, 'rhr_avg', value_json.get('avg_rhr'), row['Value']))
-                    metrics.append((ts, 'heart_rate_avg', value_json.get('avg_hr'), row['Value']))
+                metrics = extract(json.loads(row['Value']))
             except (json.JSONDecodeError, ValueError, TypeError):
                 continue
-    return metrics
+            for metric_type, value in metrics:
+                yield (ts, metric_type, value, row['Value'])
 
-def parse_sport_records(filepath):
+def parse_sport_records(filepath, since=None, state=None):
     """
     [cite_start]解析 hlth_center_sport_record.csv  [cite: 71, 311, 378-381, 711, 750, 753]
+    逐行生成 (timestamp, metric_type, value_numeric, value_text)，不在内存中保留整个文件。
+    since / state 的含义与 parse_aggregated_data 相同。
     """
-    metrics = []
     with open(filepath, 'r', encoding='utf-8') as f:
         reader = csv.DictReader(f)
         for row in reader:
+            try:
+                watermark = _row_watermark(row)
+            except (ValueError, TypeError):
+                continue
+            if state is not None:
+                state['rows_read'] = state.get('rows_read', 0) + 1
+                if state.get('watermark') is None or watermark > state['watermark']:
+                    state['watermark'] = watermark
+            if since is not None and watermark <= since:
+                continue
             try:
                 ts = datetime.fromtimestamp(int(row['Time']))
                 key = row['Key']
@@ -58,49 +201,313 @@ def parse_sport_records(filepath):
                 extreme_min = value_json.get('hrm_extreme_duration', 0) / 60.0
                 # --- 结束 ---
                 
-                metrics.append((ts, f'workout_duration_min', duration_min, row['Value']))
-                metrics.append((ts, f'workout_calories', value_json.get('calories'), row['Value']))
-                metrics.append((ts, f'workout_avg_hrm', value_json.get('avg_hrm'), row['Value']))
-                metrics.append((ts, f'workout_train_load', value_json.get('train_load'), row['Value']))
+                yield (ts, f'workout_duration_min', duration_min, row['Value'])
+                yield (ts, f'workout_calories', value_json.get('calories'), row['Value'])
+                yield (ts, f'workout_avg_hrm', value_json.get('avg_hrm'), row['Value'])
+                yield (ts, f'workout_train_load', value_json.get('train_load'), row['Value'])
                 
                 # --- 新增：存入新指标 ---
-                metrics.append((ts, f'workout_aerobic_min', aerobic_min, row['Value']))
-                metrics.append((ts, f'workout_anaerobic_min', anaerobic_min, row['Value']))
-                metrics.append((ts, f'workout_extreme_min', extreme_min, row['Value']))
+                yield (ts, f'workout_aerobic_min', aerobic_min, row['Value'])
+                yield (ts, f'workout_anaerobic_min', anaerobic_min, row['Value'])
+                yield (ts, f'workout_extreme_min', extreme_min, row['Value'])
                 # --- 结束 ---
                 
             except (json.JSONDecodeError, ValueError, TypeError):
                 continue
-    return metrics
+
+
+# 日内采样文件中每个 Key 的数值字段 -> 时间序列指标名
+INTRADAY_FIELDS = {
+    'heart_rate': {'bpm': 'heart_rate'},
+    'steps': {'steps': 'steps', 'distance': 'distance', 'calories': 'calories'},
+    'calories': {'calories': 'calories'},
+    'stress': {'stress': 'stress'},
+    'spo2': {'spo2': 'spo2'},
+}
+
+def parse_intraday_data(filepath, since=None, state=None):
+    """
+    解析 hlth_center_fitness_data.csv (分钟级心率/步数/压力/血氧等日内采样)。
+    逐个生成 (metric, unix_ts, value)，写入 timeseries 分块存储而不是 health_metrics。
+    Value 可以是单个采样 {"time": ..., "bpm": ...}，也可以是采样列表；没有 time 时使用行的 Time。
+    since / state 的含义与 parse_aggregated_data 相同。
+    """
+    with open(filepath, 'r', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            try:
+                watermark = _row_watermark(row)
+            except (ValueError, TypeError):
+                continue
+            if state is not None:
+                state['rows_read'] = state.get('rows_read', 0) + 1
+                if state.get('watermark') is None or watermark > state['watermark']:
+                    state['watermark'] = watermark
+            if since is not None and watermark <= since:
+                continue
+            fields = INTRADAY_FIELDS.get(row.get('Key'))
+            if fields is None:
+                continue
+            try:
+                value_json = json.loads(row['Value'])
+                samples = value_json if isinstance(value_json, list) else [value_json]
+                for sample in samples:
+                    ts = int(sample.get('time') or row['Time'])
+                    for field, metric in fields.items():
+                        value = sample.get(field)
+                        if value is not None:
+                            yield (metric, ts, float(value))
+            except (json.JSONDecodeError, ValueError, TypeError, AttributeError):
+                continue
+
+
+def _write_intraday_samples(conn, samples, **options):
+    """日内采样的写入函数；timeseries (NumPy) 只在真正导入这类文件时才加载。"""
+    import timeseries
+    return timeseries.insert_samples_stream(conn, samples, **options)
+
+
+# 支持的导出文件: (文件名中的标识, 描述, 解析函数, 写入函数)
+# 按顺序匹配：'aggregated_fitness_data' 也包含 'fitness_data'，所以日内采样文件必须排在后面。
+SUPPORTED_FILES = [
+    ('aggregated_fitness_data', "'Aggregated Fitness Data' (每日总结)", parse_aggregated_data,
+     database.insert_health_metrics_stream),
+    ('sport_record', "'Sport Record' (运动记录)", parse_sport_records,
+     database.insert_health_metrics_stream),
+    ('fitness_data', "'Fitness Data' (日内采样)", parse_intraday_data, _write_intraday_samples),
+]
+
+def detect_parser(filename):
+    """根据文件名选择解析函数，返回 (描述, 解析函数, 写入函数)；不支持的文件返回 None。"""
+    for marker, label, parser, writer in SUPPORTED_FILES:
+        if marker in filename:
+            return label, parser, writer
+    return None
+
+
+# --- 增量导入：每个数据源的水位 ---
+# 解析规则的版本：手动递增的 PARSER_REVISION 加上指标注册表的摘要，记录在 import_state 中。
+# 版本变化后 (例如在 DAILY_METRICS 中加了指标)，以前导入过的文件即使没有变化也会从头重新解析一次，
+# 新指标因此能从旧文件中补齐。修改解析函数本身的行为时请递增 PARSER_REVISION。
+PARSER_REVISION = 1
+PARSER_VERSION = f"{PARSER_REVISION}-" + hashlib.sha1(
+    repr((DAILY_METRICS, INTRADAY_FIELDS)).encode('utf-8')).hexdigest()[:12]
+
+def source_key(filename):
+    """
+    数据源标识：去掉导出文件名开头的日期前缀 (如 '20251122_')，
+    这样同一账号、同一类型的新导出文件会沿用上一次的水位。
+    """
+    return re.sub(r'^\d{8}_', '', os.path.basename(filename))
+
+def file_hash(filepath):
+    """文件内容的 SHA-256，用于判断文件自上次导入后是否有变化。"""
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def get_previous_import(conn, filepath, filename=None):
+    """
+    返回 (source, 当前文件哈希, 上次的水位, 文件是否未变化)。
+    filename 为上传文件的原始文件名 (临时文件的路径不能用来识别数据源)。
+    上次导入使用的解析规则版本与 PARSER_VERSION 不同时，按从未导入过处理 (水位为 None)。
+    """
+    source = source_key(filename or filepath)
+    current_hash = file_hash(filepath)
+    previous = database.get_import_state(conn, source)
+    if previous is None:
+        return source, current_hash, None, False
+    previous_hash, watermark, parser_version = previous
+    if parser_version != PARSER_VERSION:
+        return source, current_hash, None, False
+    return source, current_hash, watermark, previous_hash == current_hash
+# --- 增量导入结束 ---
+
+
+def _echo_progress(rows_processed, rows_inserted):
+    click.echo(f"  已处理 {rows_processed} 条，新增 {rows_inserted} 条...")
 
 
 @click.command("import")
 @click.argument('filepath', type=click.Path(exists=True))
-def import_data(filepath):
+@click.option('--chunk-size', default=None, type=int,
+              help=f'每个事务写入的行数 (默认: 每日指标 {database.HEALTH_METRICS_CHUNK_SIZE}，日内采样 100000)')
+@click.option('--full', is_flag=True, help='忽略上次导入的水位，重新扫描整个文件。')
+def import_data(filepath, chunk_size, full):
     """
     从导出的CSV文件 (如小米手环) 导入健康数据。
     """
     click.echo(f"正在从 {filepath} 导入数据...")
-    metrics_data = []
-    filename = filepath.split('/')[-1]
-
-    if 'aggregated_fitness_data' in filename:
-        click.echo("检测到 'Aggregated Fitness Data' (每日总结) ...")
-        metrics_data = parse_aggregated_data(filepath)
-    elif 'sport_record' in filename:
-        click.echo("检测到 'Sport Record' (运动记录) ...")
-        metrics_data = parse_sport_records(filepath)
-    else:
-        click.echo(f"错误: 不支持的文件。目前仅支持 '...aggregated...' 和 '...sport_record...' 文件。", err=True)
+    detected = detect_parser(os.path.basename(filepath))
+    if detected is None:
+        click.echo(f"错误: 不支持的文件。目前仅支持 '...aggregated...'、'...sport_record...' 和 '...fitness_data...' 文件。", err=True)
         return
 
-    if not metrics_data:
-        click.echo("没有解析到任何有效数据。")
+    label, parser, writer = detected
+    click.echo(f"检测到 {label} ...")
+
+    conn = database.create_connection()
+    source, current_hash, since, unchanged = get_previous_import(conn, filepath)
+    if full:
+        since, unchanged = None, False
+    if unchanged:
+        conn.close()
+        click.echo("文件自上次导入后没有变化，已跳过。")
+        return
+    if since is not None:
+        click.echo(f"增量导入: 只处理水位 {datetime.fromtimestamp(since)} 之后的记录。")
+
+    state = {'watermark': since}
+    metrics_data = parser(filepath, since=since, state=state)
+
+    # 流式分块写入 (每块 "INSERT OR IGNORE" + 提交)，内存占用与文件大小无关
+    # 未指定 --chunk-size 时使用各写入函数自己的默认值
+    options = {'chunk_size': chunk_size} if chunk_size else {}
+    rows_processed, rows_inserted = writer(conn, metrics_data, progress=_echo_progress, **options)
+    database.set_import_state(conn, source, current_hash, state['watermark'], PARSER_VERSION)
+    conn.close()
+
+    if rows_processed == 0:
+        click.echo("没有新的有效数据。" if since is not None else "没有解析到任何有效数据。")
         return
 
+    click.echo(click.style(f"成功！导入了 {rows_processed} 条健康记录 (新增 {rows_inserted} 条)。", fg="green"))
+
+
+# --- 并行导入整个导出目录 ---
+# 工作进程把解析结果按块放进一个有界队列，由主进程逐块写入。队列中最多缓存
+# IMPORT_DIR_QUEUE_CHUNKS_PER_WORKER × 进程数 个块，所以内存占用与文件大小 (包括很大的日内采样文件) 无关。
+IMPORT_DIR_QUEUE_CHUNKS_PER_WORKER = 2
+
+_chunk_queue = None
+
+def _init_parse_worker(chunk_queue):
+    global _chunk_queue
+    _chunk_queue = chunk_queue
+
+def _parse_file(filepath, since=None, chunk_size=database.HEALTH_METRICS_CHUNK_SIZE):
+    """
+    在工作进程中解析一个文件 (JSON 解码是导入的主要 CPU 开销)，每 chunk_size 行向队列发送一条消息：
+    ('rows', 路径, 行列表)，最后是 ('done', 路径, 读到的最大水位, 解析耗时秒数) 或 ('error', 路径, 错误信息)。
+    解析耗时不含等待队列空位的时间。
+    """
+    start = time.perf_counter()
+    waited = 0.0
+    try:
+        _, parser, _ = detect_parser(os.path.basename(filepath))
+        state = {'watermark': since}
+        rows = parser(filepath, since=since, state=state)
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            put_start = time.perf_counter()
+            _chunk_queue.put(('rows', filepath, chunk))
+            waited += time.perf_counter() - put_start
+        _chunk_queue.put(('done', filepath, state['watermark'], time.perf_counter() - start - waited))
+    except Exception as e:
+        _chunk_queue.put(('error', filepath, str(e)))
+
+
+@click.command("import-dir")
+@click.argument('directory', type=click.Path(exists=True, file_okay=False))
+@click.option('--workers', default=None, type=int, help='并行解析的进程数 (默认: CPU 核数)')
+@click.option('--full', is_flag=True, help='忽略上次导入的水位，重新扫描所有文件。')
+def import_dir(directory, workers, full):
+    """
+    导入整个小米运动健康导出目录中所有支持的 CSV 文件。
+
+    文件在多个进程中并行解析，由当前进程作为唯一的写入者逐块写入数据库。
+    """
+    filepaths = sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if name.endswith('.csv') and detect_parser(name) is not None
+    )
+    if not filepaths:
+        click.echo(f"错误: 在 {directory} 中没有找到支持的 CSV 文件。", err=True)
+        return
+
+    click.echo(f"正在从 {directory} 并行导入 {len(filepaths)} 个文件...")
     conn = database.create_connection()
-    # insert_health_metrics_batch 已经包含了 "INSERT OR IGNORE"
-    database.insert_health_metrics_batch(conn, metrics_data)
+    summaries = []
+
+    # 先检查每个文件的水位，未变化的文件不提交给解析进程
+    pending = {}
+    for path in filepaths:
+        source, current_hash, since, unchanged = get_previous_import(conn, path)
+        if full:
+            since, unchanged = None, False
+        if unchanged:
+            summaries.append((os.path.basename(path), 0, 0, 0, 0, None, True))
+        else:
+            pending[path] = (source, current_hash, since)
+
+    # 进程池只在 import-dir 中用到，延迟导入以免拖慢其他命令的启动
+    import multiprocessing
+    import queue
+    from concurrent.futures import ProcessPoolExecutor
+
+    workers = workers or os.cpu_count() or 1
+    chunk_queue = multiprocessing.Queue(maxsize=IMPORT_DIR_QUEUE_CHUNKS_PER_WORKER * workers)
+    # 每个文件已写入的 [记录数, 新增数, 写入耗时]
+    written = {path: [0, 0, 0.0] for path in pending}
+    remaining = set(pending)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_parse_worker,
+                             initargs=(chunk_queue,)) as pool:
+        futures = {pool.submit(_parse_file, path, pending[path][2]): path for path in pending}
+        # 各文件的块按到达顺序写入，写入始终只发生在这一个进程/连接中
+        while remaining:
+            try:
+                message = chunk_queue.get(timeout=1)
+            except queue.Empty:
+                # 工作进程异常退出 (例如被杀死) 时不会发出 'done'/'error' 消息
+                for future, path in futures.items():
+                    if path in remaining and future.done() and future.exception() is not None:
+                        remaining.discard(path)
+                        summaries.append((os.path.basename(path), None, None, 0, 0, str(future.exception()), False))
+                continue
+
+            kind, path = message[0], message[1]
+            if path not in remaining:
+                continue
+            filename = os.path.basename(path)
+            if kind == 'rows':
+                write_start = time.perf_counter()
+                _, _, writer = detect_parser(filename)
+                rows_processed, rows_inserted = writer(conn, message[2])
+                totals = written[path]
+                totals[0] += rows_processed
+                totals[1] += rows_inserted
+                totals[2] += time.perf_counter() - write_start
+            elif kind == 'error':
+                # 已写入的块保留 (重复导入会被去重)，但不更新水位，下次导入会重新扫描该文件
+                remaining.discard(path)
+                summaries.append((filename, None, None, 0, 0, message[2], False))
+            else:
+                _, _, watermark, parse_seconds = message
+                remaining.discard(path)
+                source, current_hash, _ = pending[path]
+                database.set_import_state(conn, source, current_hash, watermark, PARSER_VERSION)
+                rows_processed, rows_inserted, write_seconds = written[path]
+                summaries.append((filename, rows_processed, rows_inserted, parse_seconds, write_seconds, None, False))
+
     conn.close()
-    
-    click.echo(click.style(f"成功！导入了 {len(metrics_data)} 条健康记录。", fg="green"))
\ No newline at end of file
+
+    click.echo(click.style("\n--- 导入报告 ---", bold=True))
+    for filename, rows_processed, rows_inserted, parse_seconds, write_seconds, error, skipped in summaries:
+        if error:
+            click.echo(click.style(f"- {filename}: 失败 ({error})", fg="red"))
+        elif skipped:
+            click.echo(f"- {filename}: 自上次导入后没有变化，已跳过。")
+        elif rows_processed == 0:
+            click.echo(f"- {filename}: 没有解析到任何有效数据。")
+        else:
+            click.echo(
+                click.style(f"- {filename}: ", fg="green") +
+                f"{rows_processed} 条记录 (新增 {rows_inserted} 条)，"
+                f"解析 {parse_seconds:.2f} 秒，写入 {write_seconds:.2f} 秒"
+            )
+# --- 并行导入结束 ---
@@ -0,0 +1,177 @@
+# plots.py
+"""
+健康指标趋势图的批量渲染和磁盘缓存 (`emanager plot` 和 /api/plot/<metric>.png 共用)。
+
+- 一次查询取出所有要画的指标在日期区间内的数据；
+- 每张图的 PNG 以 (指标, 日期区间, 该指标数据的摘要, 样式版本) 命名缓存在磁盘上，
+  数据没有变化的图直接返回缓存文件，不再渲染；
+- 需要渲染的图交给工作进程并行绘制 (matplotlib 的 pyplot 不是线程安全的，Web 服务的多个线程也不能共用它)。
+
+matplotlib / seaborn / pandas 只在工作进程 (或单张图直接渲染时) 中导入。
+"""
+import hashlib
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+import database
+
+PLOT_METRICS = ['sleep_score', 'stress_avg', 'rhr_avg', 'steps_total']
+
+# 修改绘图样式时递增，使旧的缓存文件失效
+PLOT_STYLE_VERSION = 1
+
+# 渲染新图后顺带删除超过这么多天没有用到的缓存文件 (日期区间每天都在变，旧文件不会再被用到)。
+# 命中缓存时会更新文件的 mtime，所以正在被使用的文件不会被删除。
+PLOT_CACHE_MAX_AGE_DAYS = 7
+
+
+def cache_dir():
+    """缓存目录：环境变量 EMANAGER_PLOT_CACHE，默认是数据库文件旁边的 plot_cache/。"""
+    return os.environ.get('EMANAGER_PLOT_CACHE') or os.path.join(
+        os.path.dirname(os.path.abspath(database.DB_PATH)), 'plot_cache')
+
+
+def load_series(conn, metrics, start_date, end_date):
+    """一次查询取出多个指标在 [start_date, end_date] 内的 (日期, 数值) 序列，返回 {metric: [(day, value), ...]}。"""
+    series = {metric: [] for metric in metrics}
+    placeholders = ", ".join("?" for _ in metrics)
+    c = conn.cursor()
+    c.execute(f"""
+        SELECT metric_type, DATE(timestamp) AS day, value_numeric
+        FROM health_metrics
+        WHERE metric_type IN ({placeholders})
+          AND timestamp >= ?
+          AND timestamp < ?
+        ORDER BY metric_type, day
+    """, (*metrics, *database.day_bounds(start_date, end_date)))
+    for metric, day, value in c.fetchall():
+        series[metric].append((day, value))
+    return series
+
+
+def _cache_path(metric, start_date, end_date, rows):
+    digest = hashlib.sha1(repr(rows).encode('utf-8')).hexdigest()[:16]
+    name = f"{metric}_{start_date}_{end_date}_v{PLOT_STYLE_VERSION}_{digest}.png"
+    return os.path.join(cache_dir(), name)
+
+
+def _touch(path):
+    """标记缓存文件刚被用过；文件不存在 (还没渲染或已被清理) 时返回 False。"""
+    try:
+        os.utime(path)
+        return True
+    except FileNotFoundError:
+        return False
+
+
+def _prune_cache(directory, keep=()):
+    cutoff = datetime.now().timestamp() - PLOT_CACHE_MAX_AGE_DAYS * 86400
+    for entry in os.scandir(directory):
+        if entry.name.endswith('.png') and entry.path not in keep and entry.stat().st_mtime < cutoff:
+            try:
+                os.unlink(entry.path)
+            except FileNotFoundError:  # 另一个进程已删除
+                pass
+
+
+_theme_applied = False
+
+def render_png(metric, days, rows, path):
+    """绘制一个指标的每日折线和 7 天滚动平均，保存为 path。在工作进程中运行。"""
+    global _theme_applied
+    import pandas as pd
+    import matplotlib
+    matplotlib.use('Agg')  # 非交互式后端，不打开窗口
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    from matplotlib.dates import DateFormatter
+
+    if not _theme_applied:  # 每个进程只设置一次主题
+        sns.set_theme(style="whitegrid")
+        _theme_applied = True
+
+    df = pd.DataFrame(rows, columns=['date', 'value'])
+    df['date'] = pd.to_datetime(df['date'])
+    df['value'] = pd.to_numeric(df['value'])
+
+    fig, ax = plt.subplots(figsize=(12, 7))
+    try:
+        sns.lineplot(data=df, x='date', y='value', marker='o', label=f'每日 {metric}', ax=ax)
+        # 7 天滚动平均线，让趋势更清晰
+        df['7-day avg'] = df['value'].rolling(window=7, min_periods=1).mean()
+        sns.lineplot(data=df, x='date', y='7-day avg', color='red', linestyle='--', label='7天滚动平均', ax=ax)
+
+        ax.set_title(f"每日 {metric.replace('_', ' ').title()} (过去 {days} 天)", fontsize=16)
+        ax.set_xlabel("日期", fontsize=12)
+        ax.set_ylabel(metric.replace('_', ' ').title(), fontsize=12)
+        ax.xaxis.set_major_formatter(DateFormatter("%m-%d"))
+        ax.tick_params(axis='x', labelrotation=45)
+        ax.legend()
+        fig.tight_layout()
+
+        # 先写临时文件再改名，其他进程不会读到写了一半的 PNG
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        fig.savefig(temp_path, format='png')
+        os.replace(temp_path, path)
+    finally:
+        plt.close(fig)
+    return path
+
+
+# Web 服务共用的渲染进程池，第一次需要渲染时创建
+_shared_executor = None
+_shared_lock = threading.Lock()
+
+def shared_executor(max_workers=2):
+    global _shared_executor
+    with _shared_lock:
+        # 工作进程异常退出后进程池不可再用 (BrokenProcessPool)，换一个新的
+        if _shared_executor is None or getattr(_shared_executor, '_broken', False):
+            # spawn: 不从多线程的服务进程 fork
+            _shared_executor = ProcessPoolExecutor(max_workers=max_workers,
+                                                   mp_context=multiprocessing.get_context('spawn'))
+        return _shared_executor
+
+
+def render_plots(conn, metrics, days, end_date=None, executor=None, workers=None):
+    """
+    返回 {metric: PNG 路径}，没有数据的指标为 None。
+    缓存中已有的图直接返回；其余的图交给 executor (未指定时，多于一张图则临时创建 workers 个进程) 并行渲染，
+    只有一张图要渲染且没有 executor 时在当前进程中渲染。
+    """
+    end_date = end_date or datetime.now().date()
+    start_date = end_date - timedelta(days=days - 1)
+    series = load_series(conn, metrics, start_date, end_date)
+
+    paths = {}
+    missing = []
+    for metric in metrics:
+        rows = series[metric]
+        if not rows:
+            paths[metric] = None
+            continue
+        paths[metric] = _cache_path(metric, start_date, end_date, rows)
+        if not _touch(paths[metric]):
+            missing.append(metric)
+    if not missing:
+        return paths
+
+    os.makedirs(cache_dir(), exist_ok=True)
+    if executor is None and len(missing) == 1:
+        render_png(missing[0], days, series[missing[0]], paths[missing[0]])
+    else:
+        own_executor = executor is None
+        if own_executor:
+            executor = ProcessPoolExecutor(max_workers=min(workers or os.cpu_count() or 1, len(missing)))
+        try:
+            futures = [executor.submit(render_png, metric, days, series[metric], paths[metric]) for metric in missing]
+            for future in futures:
+                future.result()
+        finally:
+            if own_executor:
+                executor.shutdown()
+    _prune_cache(cache_dir(), keep=set(paths.values()))
+    return paths
@@ -0,0 +1,164 @@
+# profiling.py
+"""
+emanager 的 --profile / --memprofile 全局选项。
+
+只有在命令行指定了这两个选项时 emanager.py 才会导入本模块；
+cProfile / pstats / tracemalloc 也在开始分析时才导入，所以不加选项运行命令没有任何额外开销。
+分析在 emanager 命令组的回调中开始，在命令组的 click 上下文关闭时 (子命令执行完毕，包括出错退出) 结束并输出结果。
+"""
+import os
+
+import click
+
+# 终端上打印的条目数
+PROFILE_TOP = 25
+MEMPROFILE_TOP = 15
+# 峰值采样：每隔多少秒检查一次内存，比上一次快照时多出多少比例才重新拍快照
+MEMPROFILE_INTERVAL = 0.01
+MEMPROFILE_GROWTH = 0.05
+# 折叠栈中低于此值 (微秒) 的调用路径省略，避免输出被大量零碎路径淹没
+COLLAPSED_MIN_US = 10
+
+
+def start_cpu_profile(ctx, path):
+    """开始 cProfile，命令结束时把统计写入 path (.prof) 和同名的 .collapsed 折叠栈文件。"""
+    import cProfile
+
+    profiler = cProfile.Profile()
+    ctx.call_on_close(lambda: _finish_cpu_profile(profiler, path))
+    profiler.enable()
+
+
+def _finish_cpu_profile(profiler, path):
+    import pstats
+
+    profiler.disable()
+    profiler.dump_stats(path)
+    stats = pstats.Stats(profiler)
+    collapsed_path = os.path.splitext(path)[0] + '.collapsed'
+    with open(collapsed_path, 'w', encoding='utf-8') as f:
+        for stack, microseconds in collapsed_stacks(stats):
+            f.write(f"{stack} {microseconds}\n")
+
+    click.echo(click.style(f"\n--- CPU profile (按累计时间前 {PROFILE_TOP} 项) ---", bold=True), err=True)
+    stream = click.get_text_stream('stderr')
+    pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(PROFILE_TOP)
+    click.echo(f"已写入 {path} (snakeviz / pstats) 和 {collapsed_path} (flamegraph.pl / speedscope)", err=True)
+
+
+def _frame_name(func):
+    filename, line, name = func
+    if filename == '~':  # 内置函数
+        return name.replace(';', ',')
+    return f"{os.path.basename(filename)}:{line}({name})".replace(';', ',')
+
+
+def collapsed_stacks(stats):
+    """
+    把 pstats 的调用关系展开成折叠栈 [('a;b;c', 自身耗时微秒)]。
+    cProfile 只记录调用者 -> 被调用者的边，所以一个函数在不同调用路径上的耗时按各条边的累计时间比例分摊。
+    递归调用 (函数已在当前路径上) 不再展开。
+    """
+    entries = stats.stats  # func -> (primitive calls, calls, tottime, cumtime, callers)
+    callees = {}
+    for func, (_, _, _, _, callers) in entries.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge[3]))
+
+    totals = {}
+
+    def walk(func, path, on_path, scale):
+        _, _, tottime, cumtime, _ = entries[func]
+        stack = path + (_frame_name(func),)
+        self_us = int(tottime * scale * 1_000_000)
+        if self_us:
+            key = ';'.join(stack)
+            totals[key] = totals.get(key, 0) + self_us
+        for callee, edge_cumtime in callees.get(func, ()):
+            callee_cumtime = entries[callee][3]
+            if callee in on_path or not callee_cumtime:
+                continue
+            child_scale = scale * edge_cumtime / callee_cumtime
+            if callee_cumtime * child_scale * 1_000_000 < COLLAPSED_MIN_US:
+                continue
+            on_path.add(callee)
+            walk(callee, stack, on_path, child_scale)
+            on_path.discard(callee)
+
+    for func, (_, _, _, _, callers) in entries.items():
+        if not callers:  # 根节点：没有被分析范围内的函数调用过
+            walk(func, (), {func}, 1.0)
+    return sorted(totals.items())
+
+
+def start_memory_profile(ctx):
+    """开始 tracemalloc，命令结束时打印峰值内存和接近峰值时分配最多的代码位置。"""
+    import tracemalloc
+
+    tracemalloc.start()
+    sampler = _PeakSampler()
+    sampler.start()
+    ctx.call_on_close(lambda: _finish_memory_profile(sampler))
+
+
+class _PeakSampler:
+    """
+    后台线程每隔 MEMPROFILE_INTERVAL 秒查看一次已跟踪的内存，当前内存比已保存的快照多出 MEMPROFILE_GROWTH 以上时重新拍快照。
+    命令结束时还活着的分配往往很少 (导入的块写完就释放了)，真正需要看的是峰值附近的分配。
+    快照对象本身不计入 tracemalloc 的统计，统计在命令结束后才计算。
+    """
+
+    def __init__(self):
+        import threading
+
+        self.snapshot = None
+        self.snapshot_size = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='memprofile-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(MEMPROFILE_INTERVAL):
+            self.sample()
+
+    def sample(self):
+        import tracemalloc
+
+        current, _ = tracemalloc.get_traced_memory()
+        if self.snapshot is None or current > self.snapshot_size * (1 + MEMPROFILE_GROWTH):
+            self.snapshot = tracemalloc.take_snapshot()
+            self.snapshot_size = current
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.sample()  # 命令结束时的内存可能就是最高点
+
+
+def _finish_memory_profile(sampler):
+    import tracemalloc
+
+    sampler.stop()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # 分析工具自身 (tracemalloc / cProfile / pstats / 本模块和采样线程) 的分配不计入
+    snapshot = sampler.snapshot.filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '*/cProfile.py'),
+        tracemalloc.Filter(False, '*/pstats.py'),
+        tracemalloc.Filter(False, __file__),
+        tracemalloc.Filter(False, '*/threading.py'),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    ])
+
+    mib = 1024 * 1024
+    click.echo(click.style(
+        f"\n--- 内存分配 (峰值 {peak / mib:.1f} MiB；下列为内存达到 {sampler.snapshot_size / mib:.1f} MiB 时"
+        f"仍存活的分配，前 {MEMPROFILE_TOP} 个位置) ---", bold=True), err=True)
+    for stat in snapshot.statistics('lineno')[:MEMPROFILE_TOP]:
+        frame = stat.traceback[0]
+        click.echo(f"{stat.size / 1024:10.1f} KiB {stat.count:8} 块  {frame.filename}:{frame.lineno}", err=True)
+    click.echo(f"峰值: {peak / mib:.1f} MiB，命令结束时: {current / mib:.1f} MiB", err=True)
@@ -47,14 +47,15 @@ def provide_guidance(conn, event):
             return
         # --- 新增结束 ---
 
+        # 活动统计索引中每个 (活动, 状态, 目标) 只有一行，不随事件数增长
         c.execute("""
-            SELECT e.activity, g.goal_name
-            FROM events e
-            JOIN goals g ON e.goal_id = g.goal_id
-            WHERE (e.key_state = 'Growth' OR e.key_state = 'Abundance')
+            SELECT s.activity, g.goal_name
+            FROM activity_stats s
+            JOIN goals g ON s.goal_id = g.goal_id
+            WHERE (s.key_state = 'Growth' OR s.key_state = 'Abundance')
               AND g.priority_level = 1
-              AND e.duration_minutes <= 30
-            ORDER BY e.timestamp_start DESC
+              AND s.last_short_start IS NOT NULL
+            ORDER BY s.last_short_start DESC
             LIMIT 1
         """)
         rec = c.fetchone()
@@ -71,7 +72,7 @@ def provide_guidance(conn, event):
         # (此逻辑不变)
         click.echo(click.style("\n[指导]：检测到 '消耗' 状态。是时候主动恢复了。", fg="cyan"))
         c.execute("""
-            SELECT activity, COUNT(*) as count FROM events
+            SELECT activity, SUM(event_count) as count FROM activity_stats
             WHERE key_state = 'Abundance'
             GROUP BY activity
             ORDER BY count DESC
@@ -109,8 +110,8 @@ def get_sleep_recommendation(conn):
 
     c.execute("""
         SELECT value_numeric FROM health_metrics
-        WHERE metric_type = 'sleep_total_min' AND DATE(timestamp) >= ?
-    """, (seven_days_ago,))
+        WHERE metric_type = 'sleep_total_min' AND timestamp >= ?
+    """, (database.day_start(seven_days_ago),))
     
     sleep_data = c.fetchall()
     
@@ -129,37 +130,30 @@ def get_sleep_recommendation(conn):
         
     return recommendation
 
-def get_exercise_recommendation(conn):
+def get_exercise_recommendation(conn, assessment=None):
     """
     根据昨日的恢复数据和主观记录，提供今日的运动建议。
+    assessment 为昨日的能量评估 (analysis.assess_range 的结果)，为 None 时自动计算。
     """
+    # Lazy import to avoid circular dependency
+    from analysis import assess_range
+
     c = conn.cursor()
     yesterday = (datetime.now() - timedelta(days=1)).date()
 
-    # 1. 获取昨日的关键恢复指标
-    c.execute("""
-        SELECT metric_type, value_numeric FROM health_metrics
-        WHERE DATE(timestamp) = ? AND metric_type IN ('sleep_score', 'rhr_avg')
-    """, (yesterday,))
-    
-    yesterday_metrics = dict(c.fetchall())
-    sleep_score = yesterday_metrics.get('sleep_score', 0)
-    rhr_avg = yesterday_metrics.get('rhr_avg', 0)
-
-    # 2. 获取静息心率基线
-    seven_days_ago = (datetime.now() - timedelta(days=8)).date()
-    c.execute("""
-        SELECT AVG(value_numeric) FROM health_metrics
-        WHERE metric_type = 'rhr_avg' AND value_numeric > 0 AND DATE(timestamp) >= ? AND DATE(timestamp) < ?
-    """, (seven_days_ago, yesterday))
-    rhr_baseline_data = c.fetchone()
-    rhr_baseline = rhr_baseline_data[0] if rhr_baseline_data and rhr_baseline_data[0] else rhr_avg or 60
+    # 1. 获取昨日的关键恢复指标 (静息心率及其7天基线来自批量评估引擎)
+    if assessment is None:
+        assessment = assess_range(conn, yesterday, yesterday)[yesterday]['assessment']
+    yesterday_health = database.get_daily_health(conn, yesterday).get(yesterday.isoformat(), {})
+    sleep_score = yesterday_health.get('sleep_score', 0)
+    rhr_avg = assessment['latest_rhr']
+    rhr_baseline = assessment['rhr_baseline']
 
-    # 3. 获取昨日的“内耗”总时长
+    # 2. 获取昨日的“内耗”总时长
     c.execute("""
-        SELECT SUM(duration_minutes) FROM events
-        WHERE key_state = 'Internal friction' AND DATE(timestamp_start) = ?
-    """, (yesterday,))
+        SELECT SUM(total_minutes) FROM activity_daily_stats
+        WHERE key_state = 'Internal friction' AND day = ?
+    """, (database.day_start(yesterday),))
     friction_minutes_data = c.fetchone()
     friction_hours = (friction_minutes_data[0] / 60) if friction_minutes_data and friction_minutes_data[0] else 0
 
@@ -0,0 +1,80 @@
+# serve.py
+import click
+import database
+
+
+def _check_schema():
+    """启动时检查一次表结构：已是最新版本时不做任何建表/迁移。"""
+    conn = database.create_connection(check_schema=False)
+    try:
+        if database.ensure_schema(conn):
+            click.echo(f"数据库表结构已更新到版本 {database.SCHEMA_VERSION}。")
+    finally:
+        conn.close()
+
+
+def _run_waitress(app, host, port, threads, connection_limit, channel_timeout):
+    try:
+        from waitress import serve as waitress_serve
+    except ImportError:
+        raise click.ClickException("需要安装 waitress: pip install waitress")
+    waitress_serve(
+        app,
+        host=host,
+        port=port,
+        threads=threads,
+        connection_limit=connection_limit,
+        channel_timeout=channel_timeout,  # 空闲 keep-alive 连接和慢请求在此秒数后断开
+        ident="emanager",
+    )
+
+
+def _run_gunicorn(app, host, port, workers, threads, timeout, keepalive):
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        raise click.ClickException("多进程模式 (--workers > 1) 需要安装 gunicorn: pip install gunicorn")
+
+    class EmanagerApplication(BaseApplication):
+        def load_config(self):
+            self.cfg.set("bind", f"{host}:{port}")
+            self.cfg.set("workers", workers)
+            self.cfg.set("worker_class", "gthread")
+            self.cfg.set("threads", threads)
+            self.cfg.set("timeout", timeout)
+            self.cfg.set("keepalive", keepalive)
+
+        def load(self):
+            return app
+
+    EmanagerApplication().run()
+
+
+@click.command()
+@click.option('--host', default='0.0.0.0', show_default=True, help='监听地址。')
+@click.option('--port', default=5000, show_default=True, help='监听端口。')
+@click.option('--threads', default=8, show_default=True, help='每个进程处理请求的线程数。')
+@click.option('--workers', default=1, show_default=True,
+              help='进程数。大于 1 时使用 gunicorn (仅 Unix)，否则使用 waitress。')
+@click.option('--connection-limit', default=100, show_default=True, help='最大并发连接数 (waitress)。')
+@click.option('--timeout', default=120, show_default=True,
+              help='请求超时秒数 (waitress 的 channel_timeout / gunicorn 的 timeout)。')
+@click.option('--keepalive', default=5, show_default=True, help='keep-alive 连接保持秒数 (gunicorn)。')
+def serve(host, port, threads, workers, connection_limit, timeout, keepalive):
+    """Runs the web interface under a production WSGI server."""
+    _check_schema()
+
+    # Flask 及其依赖只有 serve 命令需要，延迟导入以免拖慢其他命令的启动
+    from web_server import app
+    import import_jobs
+
+    interrupted = import_jobs.fail_interrupted_jobs()
+    if interrupted:
+        click.echo(f"{interrupted} 个在上次退出时未完成的导入任务已标记为失败。")
+
+    click.echo(f"Energy Manager 正在 http://{host}:{port} 上提供服务 "
+               f"({workers} 个进程 x {threads} 个线程)，按 Ctrl+C 停止。")
+    if workers > 1:
+        _run_gunicorn(app, host, port, workers, threads, timeout, keepalive)
+    else:
+        _run_waitress(app, host, port, threads, connection_limit, timeout)
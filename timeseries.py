@@ -0,0 +1,137 @@
+# timeseries.py
+"""
+日内采样 (分钟级心率、步数、压力等) 的分块压缩存储。
+
+逐条存进 health_metrics 会让表膨胀到数百万行，所以这里每个 (指标, 本地日期) 只存一行
+timeseries_chunks 记录：
+  times - 采样时间 (Unix 秒) 的差分序列，int64 小端，zlib 压缩；
+  vals  - 采样值 × VALUE_SCALE 取整后的差分序列，编码方式相同。
+分钟级数据的差分几乎都是同一个小整数，一天 1440 个采样压缩后只有几百字节。
+按日期区间读取时只需按主键取出涉及的几行，解码后直接得到 NumPy 数组。
+"""
+import zlib
+from collections import defaultdict
+from datetime import date
+
+import numpy as np
+
+import database
+
+# 数值以定点整数存储，保留 3 位小数
+VALUE_SCALE = 1000
+
+# 导入时缓存多少个采样后合并写入一次 (每次写入一个事务)
+TIMESERIES_FLUSH_SIZE = 100000
+
+
+def _encode(array):
+    deltas = np.diff(np.asarray(array, dtype=np.int64), prepend=np.int64(0))
+    return zlib.compress(deltas.astype('<i8').tobytes(), 6)
+
+
+def _decode(blob):
+    return np.cumsum(np.frombuffer(zlib.decompress(blob), dtype='<i8'), dtype=np.int64)
+
+
+def encode_chunk(timestamps, values):
+    """把按时间排序的 (timestamps, values) 编码为 (times_blob, vals_blob)。"""
+    scaled = np.rint(np.asarray(values, dtype=np.float64) * VALUE_SCALE).astype(np.int64)
+    return _encode(timestamps), _encode(scaled)
+
+
+def decode_chunk(times_blob, vals_blob):
+    """encode_chunk 的逆操作，返回 (timestamps int64, values float64)。"""
+    return _decode(times_blob), _decode(vals_blob) / VALUE_SCALE
+
+
+def write_samples(conn, metric, day, timestamps, values):
+    """
+    把某指标某天的一批采样合并进已有的数据块 (同一时间戳以新值为准)。
+    返回新增的采样数；不提交事务。
+    """
+    ts = np.asarray(timestamps, dtype=np.int64)
+    vs = np.asarray(values, dtype=np.float64)
+    c = conn.cursor()
+    c.execute("SELECT times, vals FROM timeseries_chunks WHERE metric = ? AND day = ?", (metric, day))
+    row = c.fetchone()
+    existing = 0
+    if row is not None:
+        old_ts, old_vs = decode_chunk(*row)
+        existing = len(old_ts)
+        ts = np.concatenate([old_ts, ts])
+        vs = np.concatenate([old_vs, vs])
+
+    # 稳定排序后每个时间戳只保留最后一个，即最新写入的值
+    order = np.argsort(ts, kind='stable')
+    ts, vs = ts[order], vs[order]
+    keep = np.append(ts[1:] != ts[:-1], True)
+    ts, vs = ts[keep], vs[keep]
+
+    times_blob, vals_blob = encode_chunk(ts, vs)
+    c.execute("""
+        INSERT OR REPLACE INTO timeseries_chunks (metric, day, sample_count, first_ts, last_ts, times, vals)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, (metric, day, len(ts), int(ts[0]), int(ts[-1]), times_blob, vals_blob))
+    return len(ts) - existing
+
+
+def insert_samples_stream(conn, samples_iter, chunk_size=TIMESERIES_FLUSH_SIZE, progress=None):
+    """
+    写入一个 (metric, unix_ts, value) 采样迭代器 (例如 importer.parse_intraday_data)。
+    采样按 (指标, 本地日期) 分组缓存，每 chunk_size 个采样合并写入一次并提交，文件无需按时间排序。
+    每次提交后调用 progress(samples_processed, samples_inserted)。
+    返回 (samples_processed, samples_inserted)，与 database.insert_health_metrics_stream 一致。
+    """
+    buffer = defaultdict(lambda: ([], []))
+    processed = 0
+    inserted = 0
+    buffered = 0
+
+    def flush():
+        nonlocal inserted
+        for (metric, day), (timestamps, values) in buffer.items():
+            inserted += write_samples(conn, metric, day, timestamps, values)
+        conn.commit()
+        buffer.clear()
+        if progress is not None:
+            progress(processed, inserted)
+
+    for metric, ts, value in samples_iter:
+        timestamps, values = buffer[(metric, date.fromtimestamp(ts).isoformat())]
+        timestamps.append(ts)
+        values.append(value)
+        processed += 1
+        buffered += 1
+        if buffered >= chunk_size:
+            flush()
+            buffered = 0
+    if buffered:
+        flush()
+    return processed, inserted
+
+
+def read_daily(conn, metric, start_date, end_date=None):
+    """
+    读取 [start_date, end_date] 这几天 (end_date 为 None 时只取当天) 某指标的采样，
+    返回 {'YYYY-MM-DD': (timestamps, values)}，数组按时间排序。
+    """
+    start, end = database.day_bounds(start_date, end_date)
+    c = conn.cursor()
+    c.execute("""
+        SELECT day, times, vals FROM timeseries_chunks
+        WHERE metric = ? AND day >= ? AND day < ?
+        ORDER BY day
+    """, (metric, start, end))
+    return {day: decode_chunk(times_blob, vals_blob) for day, times_blob, vals_blob in c.fetchall()}
+
+
+def read_range(conn, metric, start_date, end_date=None):
+    """
+    读取 [start_date, end_date] 区间内某指标的全部采样，
+    返回 (timestamps, values) 两个 NumPy 数组 (Unix 秒 int64 / float64)，按时间排序。
+    """
+    chunks = list(read_daily(conn, metric, start_date, end_date).values())
+    if not chunks:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+    return (np.concatenate([ts for ts, _ in chunks]),
+            np.concatenate([vs for _, vs in chunks]))
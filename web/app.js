@@ -71,7 +71,7 @@ async function loadPageData(page) {
             await loadGoals();
             break;
         case 'journal':
-            await loadJournal(90);
+            await loadJournal();
             break;
         case 'trends':
             await loadTrends(14);
@@ -91,17 +91,17 @@ async function initializeApp() {
 }
 
 // ==================== DASHBOARD ====================
-async function loadDashboard() {
+async function loadDashboard(dateString = null) {
     try {
-        const todayEvents = await fetchTodayEvents();
-        const goals = await fetchGoals();
-        goalsCache = goals; // Update cache for modals
-        const healthData = await fetchTodayHealth();
-
-        updateDashboardStats(todayEvents, goals, healthData);
-        updateEnergyChart(7);
-        updateBalanceChart(7);
-        updateRecentActivity(todayEvents);
+        // One request for every dashboard section
+        const dashboard = await fetchDashboard(dateString, 7);
+        if (!dashboard) return;
+        goalsCache = dashboard.goals; // Update cache for modals
+
+        updateDashboardStats(dashboard.events, dashboard.goals, dashboard.health);
+        updateEnergyChart(dashboard.energy_states);
+        updateBalanceChart(dashboard.balance);
+        updateRecentActivity(dashboard.events);
     } catch (error) {
         console.error('Error loading dashboard:', error);
     }
@@ -353,9 +353,9 @@ async function archiveGoal(goalId) {
 }
 
 // ==================== JOURNAL ====================
-async function loadJournal(days = 90) {
+async function loadJournal() {
     if (typeof renderJournal === 'function') {
-        await renderJournal(days);
+        await renderJournal();
     } else {
         console.error('renderJournal function not found. Is calendar.js loaded?');
     }
@@ -662,6 +662,7 @@ async function loadHealthMetrics(dateString = null) {
         }
 
         updateHealthTrendsChart();
+        updateHealthChart();
 
         // Load Weekly Report
         const reportData = await fetchReport();
@@ -721,9 +722,25 @@ function renderWeeklyReport(reportData) {
     container.innerHTML = html;
 }
 
+// Health page metric selector -> metric name used by /api/plot/<metric>.png
+const HEALTH_PLOT_METRICS = {
+    'Sleep Score': 'sleep_score',
+    'RHR': 'rhr_avg',
+    'Stress': 'stress_avg',
+    'Steps': 'steps_total'
+};
+
 function updateHealthChart() {
-    // Placeholder for health chart
-    // Can be implemented with historical health data
+    const img = document.getElementById('health-plot');
+    if (!img) return;
+
+    const metric = HEALTH_PLOT_METRICS[document.getElementById('health-metric-select').value];
+    const days = document.getElementById('health-days-select').value;
+    // The server answers unchanged charts from its render cache (and with 304 to
+    // the browser's If-None-Match), so refreshing does not re-render anything.
+    img.onload = () => { img.style.display = ''; };
+    img.onerror = () => { img.style.display = 'none'; };
+    img.src = `${API_BASE}/api/plot/${metric}.png?days=${days}`;
 }
 
 async function updateHealthTrendsChart() {
@@ -845,12 +862,10 @@ async function updateHealthTrendsChart() {
 }
 
 // ==================== CHARTS ====================
-async function updateEnergyChart(days) {
+function updateEnergyChart(energyStates) {
     const ctx = document.getElementById('energy-chart');
     if (!ctx) return;
 
-    const energyStates = await fetchEnergyStates(days);
-
     const chartData = {
         labels: Object.keys(energyStates),
         datasets: [{
@@ -891,12 +906,10 @@ async function updateEnergyChart(days) {
     });
 }
 
-async function updateBalanceChart(days) {
+function updateBalanceChart(balance) {
     const ctx = document.getElementById('balance-chart');
     if (!ctx) return;
 
-    const balance = await fetchEnergyBalance(days);
-
     const labels = balance.map(b => {
         const date = new Date(b.date);
         return date.toLocaleDateString('en-US', { weekday: 'short' });
@@ -1038,12 +1051,17 @@ async function importData(event) {
             body: formData
         });
 
-        if (!response.ok) throw new Error('Import failed');
-
         const result = await response.json();
+        if (!response.ok) throw new Error(result.error || 'Import failed');
+
+        // The server imports in the background; poll the job until it finishes
+        const job = await pollImportJob(result.job_id);
+        if (job.status === 'failed') throw new Error(job.message || 'Import failed');
 
         document.getElementById('progress-fill').style.width = '100%';
-        document.getElementById('progress-text').textContent = `Success! Imported ${result.count || 0} records`;
+        document.getElementById('progress-text').textContent = job.status === 'skipped'
+            ? 'File unchanged since last import'
+            : `Success! Imported ${job.rows_inserted} records (${job.duplicates_skipped} duplicates skipped)`;
         document.getElementById('progress-text').style.color = 'var(--success)';
 
         setTimeout(() => {
@@ -1071,7 +1089,48 @@ async function importData(event) {
     }
 }
 
+async function pollImportJob(jobId, intervalMs = 500) {
+    while (true) {
+        const response = await fetch(`${API_BASE}/api/import/jobs/${jobId}`);
+        if (!response.ok) throw new Error('Failed to fetch import status');
+        const job = await response.json();
+
+        if (job.status !== 'queued' && job.status !== 'running') {
+            return job;
+        }
+
+        const fraction = job.rows_total ? Math.min(job.rows_read / job.rows_total, 1) : 0;
+        const eta = job.eta_seconds != null ? `, about ${Math.ceil(job.eta_seconds)}s left` : '';
+        document.getElementById('progress-fill').style.width = `${30 + Math.round(fraction * 70)}%`;
+        document.getElementById('progress-text').textContent = job.status === 'queued'
+            ? 'Waiting for import to start...'
+            : `Parsed ${job.rows_parsed} records, inserted ${job.rows_inserted}, ` +
+              `${job.duplicates_skipped} duplicates skipped${eta}`;
+
+        await new Promise(resolve => setTimeout(resolve, intervalMs));
+    }
+}
+
 // ==================== API FUNCTIONS ====================
+async function fetchDashboard(dateString = null, days = 7) {
+    try {
+        let url = `${API_BASE}/api/dashboard?days=${days}`;
+
+        if (dateString) {
+            url += `&date=${dateString}`;
+        } else {
+            url += `&offset_days=1`;
+        }
+
+        const response = await fetch(url);
+        if (!response.ok) throw new Error('Failed to fetch dashboard');
+        return await response.json();
+    } catch (error) {
+        console.error('Error fetching dashboard:', error);
+        return null;
+    }
+}
+
 async function fetchGoals() {
     try {
         const response = await fetch(`${API_BASE}/api/goals`);
@@ -1102,19 +1161,19 @@ async function fetchTodayEvents(dateString = null) {
     }
 }
 
-async function fetchEvents(days = 7) {
-    try {
-        const startDate = new Date();
-        startDate.setDate(startDate.getDate() - days);
-        const startDateStr = startDate.toISOString().split('T')[0];
-
-        const response = await fetch(`${API_BASE}/api/events?start_date=${startDateStr}`);
+// Events in [start, end) (YYYY-MM-DD), following the server's keyset pages
+async function fetchEventsRange(start, end, limit = 500) {
+    const events = [];
+    let url = `${API_BASE}/api/events?start=${start}&end=${end}&limit=${limit}`;
+    while (url) {
+        const response = await fetch(url);
         if (!response.ok) throw new Error('Failed to fetch events');
-        return await response.json();
-    } catch (error) {
-        console.error('Error fetching events:', error);
-        return [];
+        events.push(...await response.json());
+
+        const next = /<([^>]+)>;\s*rel="next"/.exec(response.headers.get('Link') || '');
+        url = next ? `${API_BASE}${next[1]}` : null;
     }
+    return events;
 }
 
 async function fetchTodayHealth(dateString = null) {
@@ -1136,28 +1195,6 @@ async function fetchTodayHealth(dateString = null) {
     }
 }
 
-async function fetchEnergyStates(days) {
-    try {
-        const response = await fetch(`${API_BASE}/api/stats/energy-states?days=${days}`);
-        if (!response.ok) throw new Error('Failed to fetch energy states');
-        return await response.json();
-    } catch (error) {
-        console.error('Error fetching energy states:', error);
-        return {};
-    }
-}
-
-async function fetchEnergyBalance(days) {
-    try {
-        const response = await fetch(`${API_BASE}/api/stats/balance?days=${days}`);
-        if (!response.ok) throw new Error('Failed to fetch balance');
-        return await response.json();
-    } catch (error) {
-        console.error('Error fetching balance:', error);
-        return [];
-    }
-}
-
 async function fetchReport() {
     try {
         const response = await fetch(`${API_BASE}/api/report`);
@@ -1338,7 +1375,7 @@ async function logEvent(event) {
         closeModal('log-event-modal');
         document.getElementById('log-event-form').reset();
         if (currentPage === 'journal') {
-            await loadJournal(90);
+            await loadJournal();
         } else if (currentPage === 'dashboard') {
             await loadDashboard();
         }
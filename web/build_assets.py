@@ -0,0 +1,122 @@
+# web/build_assets.py
+"""
+Build the web UI into web/dist for production.
+
+- Bundles app.js + calendar.js and styles.css + enhanced.css (in page order) and minifies them.
+- Names each bundle after its content hash (app.3f9c2a1b0d.js), so it can be cached forever.
+- Rewrites index.html to reference the bundles.
+- Writes precompressed .gz (and .br when the brotli package is installed) next to every file.
+
+web_server.py serves web/dist while the source hashes recorded in manifest.json still match web/;
+after any source edit it falls back to web/ until the build is re-run.
+
+Usage:
+    python web/build_assets.py
+"""
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+
+import rcssmin
+import rjsmin
+
+try:
+    import brotli
+except ImportError:  # .br variants are optional
+    brotli = None
+
+WEB_DIR = os.path.dirname(os.path.abspath(__file__))
+DIST_DIR = os.path.join(WEB_DIR, 'dist')
+
+# Bundle name -> source files, in the order index.html loads them
+BUNDLES = {
+    'app.js': ['app.js', 'calendar.js'],
+    'styles.css': ['styles.css', 'enhanced.css'],
+}
+COMPRESSIBLE = ('.html', '.js', '.css', '.json')
+
+
+def _read(name):
+    with open(os.path.join(WEB_DIR, name), encoding='utf-8') as f:
+        return f.read()
+
+
+def _minify(bundle_name, sources):
+    if bundle_name.endswith('.js'):
+        # Each file is a classic script; the separator keeps statements apart when concatenated
+        return ';\n'.join(rjsmin.jsmin(_read(name)) for name in sources)
+    return '\n'.join(rcssmin.cssmin(_read(name)) for name in sources)
+
+
+def source_digest(name):
+    """Hash of a source file, recorded in the manifest so the server can detect a stale build."""
+    with open(os.path.join(WEB_DIR, name), 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:16]
+
+
+def _hashed_name(bundle_name, content):
+    digest = hashlib.sha256(content).hexdigest()[:10]
+    stem, ext = os.path.splitext(bundle_name)
+    return f'{stem}.{digest}{ext}'
+
+
+def _rewrite_index(manifest):
+    """Replace the per-file <link>/<script> tags with a single tag per bundle."""
+    html = _read('index.html')
+    for bundle_name, sources in BUNDLES.items():
+        if bundle_name.endswith('.js'):
+            tag = '<script src="{}"></script>'
+            pattern = r'<script src="{}(?:\?[^"]*)?"></script>'
+        else:
+            tag = '<link rel="stylesheet" href="{}">'
+            pattern = r'<link rel="stylesheet" href="{}(?:\?[^"]*)?">'
+        for i, name in enumerate(sources):
+            # The first source's line becomes the bundle tag, the other lines are removed
+            replacement = r'\g<indent>' + tag.format(manifest[bundle_name]) + '\n' if i == 0 else ''
+            line = r'^(?P<indent>[ \t]*)' + pattern.format(re.escape(name)) + r'[ \t]*\n'
+            html, count = re.subn(line, replacement, html, flags=re.MULTILINE)
+            if count != 1:
+                raise SystemExit(f'index.html: expected exactly one reference to {name}, found {count}')
+    return html
+
+
+def _write(name, content):
+    path = os.path.join(DIST_DIR, name)
+    with open(path, 'wb') as f:
+        f.write(content)
+    if name.endswith(COMPRESSIBLE):
+        with open(path + '.gz', 'wb') as f:
+            f.write(gzip.compress(content, compresslevel=9, mtime=0))
+        if brotli is not None:
+            with open(path + '.br', 'wb') as f:
+                f.write(brotli.compress(content, quality=11))
+    return len(content)
+
+
+def build():
+    shutil.rmtree(DIST_DIR, ignore_errors=True)
+    os.makedirs(DIST_DIR)
+
+    manifest = {}
+    for bundle_name, sources in BUNDLES.items():
+        content = _minify(bundle_name, sources).encode('utf-8')
+        hashed = _hashed_name(bundle_name, content)
+        manifest[bundle_name] = hashed
+        original = sum(os.path.getsize(os.path.join(WEB_DIR, name)) for name in sources)
+        size = _write(hashed, content)
+        print(f'{hashed:<28} {original:>8} -> {size:>8} bytes')
+
+    _write('index.html', _rewrite_index(manifest).encode('utf-8'))
+    sources = ['index.html'] + [name for names in BUNDLES.values() for name in names]
+    manifest['sources'] = {name: source_digest(name) for name in sources}
+    _write('manifest.json', json.dumps(manifest, indent=2).encode('utf-8'))
+    if brotli is None:
+        print('brotli not installed: only .gz variants were written')
+    print(f'Built {DIST_DIR}')
+
+
+if __name__ == '__main__':
+    build()
@@ -97,20 +97,54 @@ function showCustomPrompt(title, message, defaultValue, callback) {
     };
 }
 
-// Initialize calendar when journal page is loaded
-async function renderJournal(days = 90) {
+// Loaded event windows, keyed by "start|end" (YYYY-MM-DD, end exclusive).
+// Holds promises so a window being prefetched is not requested twice.
+const eventWindowCache = new Map();
+
+function toDateParam(date) {
+    const month = String(date.getMonth() + 1).padStart(2, '0');
+    const day = String(date.getDate()).padStart(2, '0');
+    return `${date.getFullYear()}-${month}-${day}`;
+}
+
+function fetchEventWindow(start, end) {
+    const key = `${toDateParam(start)}|${toDateParam(end)}`;
+    if (!eventWindowCache.has(key)) {
+        const request = fetchEventsRange(toDateParam(start), toDateParam(end));
+        request.catch(() => eventWindowCache.delete(key));
+        eventWindowCache.set(key, request);
+    }
+    return eventWindowCache.get(key);
+}
+
+// Warm the windows before and after the visible one so prev/next render instantly
+function prefetchAdjacentWindows(start, end) {
+    const span = end.getTime() - start.getTime();
+    fetchEventWindow(new Date(start.getTime() - span), start).catch(() => {});
+    fetchEventWindow(end, new Date(end.getTime() + span)).catch(() => {});
+}
+
+// FullCalendar event source: called with the visible range on every view/date change
+async function loadVisibleEvents(fetchInfo, successCallback, failureCallback) {
     try {
-        const events = await fetchEvents(days);
+        const events = await fetchEventWindow(fetchInfo.start, fetchInfo.end);
         calendarEvents = events;
-        console.log(`Loaded ${events.length} events for ${days} days`);
-
-        if (!calendar) {
-            initializeCalendar();
-        } else {
-            updateCalendarEvents(events);
-        }
+        console.log(`Loaded ${events.length} events for ${fetchInfo.startStr} - ${fetchInfo.endStr}`);
+        successCallback(transformEventsToCalendar(events));
+        prefetchAdjacentWindows(fetchInfo.start, fetchInfo.end);
     } catch (error) {
         console.error('Error loading journal:', error);
+        failureCallback(error);
+    }
+}
+
+// Initialize calendar when journal page is loaded; later calls reload the visible window
+async function renderJournal() {
+    if (!calendar) {
+        initializeCalendar();
+    } else {
+        eventWindowCache.clear();
+        calendar.refetchEvents();
     }
 }
 
@@ -122,8 +156,6 @@ function initializeCalendar() {
         return;
     }
 
-    console.log('Initializing calendar with', calendarEvents.length, 'events');
-
     calendar = new FullCalendar.Calendar(calendarEl, {
         initialView: 'timeGridDay',
         headerToolbar: {
@@ -138,7 +170,7 @@ function initializeCalendar() {
         slotMaxTime: '24:00:00',
         allDaySlot: false,
 
-        events: transformEventsToCalendar(calendarEvents),
+        events: loadVisibleEvents,
 
         eventDidMount: function (info) {
             const event = info.event;
@@ -250,7 +282,7 @@ function initializeCalendar() {
                                                 .then(() => {
                                                     console.log('Update successful');
                                                     showNotification('Event updated successfully!', 'success');
-                                                    loadJournal(90);
+                                                    loadJournal();
                                                 })
                                                 .catch(err => {
                                                     console.error('Update error:', err);
@@ -279,6 +311,7 @@ function initializeCalendar() {
             try {
                 const newStart = info.event.start.toISOString();
                 await updateEventTime(info.event.id, newStart);
+                eventWindowCache.clear();
                 showNotification('Event time updated!', 'success');
             } catch (error) {
                 info.revert();
@@ -294,6 +327,7 @@ function initializeCalendar() {
                 // But we need the start time too
                 const start = info.event.start.toISOString();
                 await updateEventTime(info.event.id, start, newDuration);
+                eventWindowCache.clear();
 
                 showNotification('Event duration adjusted!', 'success');
             } catch (error) {
@@ -340,13 +374,6 @@ function transformEventsToCalendar(events) {
     });
 }
 
-function updateCalendarEvents(events) {
-    if (!calendar) return;
-    const calendarEvents = transformEventsToCalendar(events);
-    calendar.removeAllEvents();
-    calendar.addEventSource(calendarEvents);
-}
-
 function changeCalendarView(viewName, buttonEl) {
     if (!calendar) return;
 
@@ -403,7 +430,7 @@ if (typeof logEvent !== 'undefined') {
             closeModal('log-event-modal');
             document.getElementById('log-event-form').reset();
             if (currentPage === 'journal') {
-                await loadJournal(90);
+                await loadJournal();
             }
             showNotification('Event logged successfully!', 'success');
         } catch (error) {
@@ -1,29 +1,322 @@
 # Flask API for Energy Manager Web Interface
-from flask import Flask, jsonify, request, send_from_directory
+from flask import Flask, g, has_app_context, jsonify, request, send_file, send_from_directory
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 import database
 import analysis
-from datetime import datetime, timedelta
+import import_jobs
+import plots
+from importer import detect_parser, parse_aggregated_data, parse_sport_records
+from bisect import bisect_left
+from collections import OrderedDict, defaultdict
+from datetime import date, datetime, timedelta
+import functools
+import hashlib
+import json
+import mimetypes
 import os
+import re
+import tempfile
+import threading
+import time
+from urllib.parse import urlencode
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """JSON provider that adds the serialization time to the current request's timings"""
+    def dumps(self, obj, **kwargs):
+        started = time.perf_counter()
+        try:
+            return super().dumps(obj, **kwargs)
+        finally:
+            if has_app_context() and 'request_started' in g:
+                g.json_seconds += time.perf_counter() - started
 
 app = Flask(__name__, static_folder='web')
+app.json = TimedJSONProvider(app)
 CORS(app)
 
-# Serve the web interface
+# Database connections come from the per-thread pool in database.py and are
+# released (not closed) when the app context ends.
+def get_db():
+    """Get the pooled SQLite connection for the current request"""
+    if 'db' not in g:
+        g.db = database.get_pooled_connection()
+    return g.db
+
+@app.teardown_appcontext
+def release_db(exception):
+    if g.pop('db', None) is not None:
+        database.release_pooled_connection()
+
+# Request instrumentation. Every request records its latency split into SQL
+# time (database query stats), JSON serialization time and the rest of the
+# application time; the split is sent back as a Server-Timing header and
+# aggregated per route for /api/_metrics (Prometheus text format). Metrics
+# are per process: with several gunicorn workers each one reports its own.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+class RequestMetrics:
+    """Thread-safe per-route counters and histograms"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (method, route, status) -> count; everything else is keyed by (method, route)
+        self._requests = defaultdict(int)
+        self._latency = defaultdict(functools.partial(self._histogram, LATENCY_BUCKETS))
+        self._sizes = defaultdict(functools.partial(self._histogram, SIZE_BUCKETS))
+        self._sql_queries = defaultdict(int)
+        self._sql_seconds = defaultdict(float)
+        self._json_seconds = defaultdict(float)
+
+    @staticmethod
+    def _histogram(bounds):
+        # One count per bound plus the +Inf bucket; cumulated when rendered
+        return {'buckets': [0] * (len(bounds) + 1), 'sum': 0.0, 'count': 0}
+
+    @staticmethod
+    def _observe(histogram, bounds, value):
+        histogram['buckets'][bisect_left(bounds, value)] += 1
+        histogram['sum'] += value
+        histogram['count'] += 1
+
+    def observe(self, method, route, status, seconds, size, queries, sql_seconds, json_seconds):
+        key = (method, route)
+        with self._lock:
+            self._requests[(method, route, status)] += 1
+            self._observe(self._latency[key], LATENCY_BUCKETS, seconds)
+            self._observe(self._sizes[key], SIZE_BUCKETS, size)
+            self._sql_queries[key] += queries
+            self._sql_seconds[key] += sql_seconds
+            self._json_seconds[key] += json_seconds
+
+    @staticmethod
+    def _labels(**labels):
+        return ','.join('{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace('"', '\\"'))
+                        for name, value in labels.items())
+
+    def _render_histogram(self, lines, name, help_text, histograms, bounds):
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+        for (method, route), histogram in sorted(histograms.items()):
+            labels = self._labels(method=method, route=route)
+            cumulative = 0
+            for bound, count in zip(bounds + ('+Inf',), histogram['buckets']):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_sum{{{labels}}} {histogram["sum"]:.6f}')
+            lines.append(f'{name}_count{{{labels}}} {histogram["count"]}')
+
+    def _render_counter(self, lines, name, help_text, values):
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+        for (method, route), value in sorted(values.items()):
+            value = f'{value:.6f}' if isinstance(value, float) else value
+            lines.append(f'{name}{{{self._labels(method=method, route=route)}}} {value}')
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            lines = ['# HELP emanager_http_requests_total HTTP requests by route and status.',
+                     '# TYPE emanager_http_requests_total counter']
+            for (method, route, status), count in sorted(self._requests.items()):
+                lines.append('emanager_http_requests_total{{{}}} {}'.format(
+                    self._labels(method=method, route=route, status=status), count))
+            self._render_histogram(lines, 'emanager_http_request_duration_seconds',
+                                   'Request latency in seconds.', self._latency, LATENCY_BUCKETS)
+            self._render_histogram(lines, 'emanager_http_response_size_bytes',
+                                   'Response body size in bytes.', self._sizes, SIZE_BUCKETS)
+            self._render_counter(lines, 'emanager_sql_queries_total',
+                                 'SQL statements executed.', self._sql_queries)
+            self._render_counter(lines, 'emanager_sql_duration_seconds_total',
+                                 'Time spent executing SQL and fetching rows.', self._sql_seconds)
+            self._render_counter(lines, 'emanager_json_duration_seconds_total',
+                                 'Time spent serializing JSON responses.', self._json_seconds)
+        return '\n'.join(lines) + '\n'
+
+request_metrics = RequestMetrics()
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    g.json_seconds = 0.0
+    database.begin_query_stats()
+
+# Registered before the other after_request hooks so it runs last and
+# measures them too (Flask runs after_request functions in reverse order).
+@app.after_request
+def record_request_metrics(response):
+    if 'request_started' not in g:
+        return response
+    total = time.perf_counter() - g.request_started
+    sql = database.end_query_stats()
+    app_seconds = max(total - sql['seconds'] - g.json_seconds, 0.0)
+    response.headers['Server-Timing'] = (
+        f'db;dur={sql["seconds"] * 1000:.2f};desc="{sql["queries"]} queries", '
+        f'json;dur={g.json_seconds * 1000:.2f}, app;dur={app_seconds * 1000:.2f}, total;dur={total * 1000:.2f}'
+    )
+
+    # Streamed file responses (static assets) report their size in Content-Length
+    size = response.content_length
+    if size is None and not response.direct_passthrough:
+        size = len(response.get_data())
+    route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    request_metrics.observe(request.method, route, response.status_code, total, size or 0,
+                            sql['queries'], sql['seconds'], g.json_seconds)
+    return response
+
+# Response cache for read-only endpoints. Entries are keyed by path, query args,
+# today's date (most endpoints default to "today") and the data version, so any
+# committed write - from this server, the CLI or another process - makes old
+# entries unreachable. Writes through this API also bump a counter and clear
+# the cache right away.
+RESPONSE_CACHE_SIZE = 256
+_response_cache = OrderedDict()
+_cache_lock = threading.Lock()
+_write_counter = 0
+
+def _cache_key():
+    args = tuple(sorted(request.args.items(multi=True)))
+    return (request.path, args, date.today().isoformat(), database.get_data_version(), _write_counter)
+
+def cached_response(view):
+    """Cache a GET view's successful response and answer conditional requests with 304"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        key = _cache_key()
+        with _cache_lock:
+            entry = _response_cache.get(key)
+            if entry is not None:
+                _response_cache.move_to_end(key)
+
+        if entry is None:
+            response = app.make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+            body = response.get_data()
+            # Keep the view's own headers (e.g. the pagination Link) with the body
+            headers = [(name, value) for name, value in response.headers
+                       if name not in ('Content-Type', 'Content-Length')]
+            entry = (body, response.mimetype, hashlib.sha1(body).hexdigest(), headers)
+            with _cache_lock:
+                _response_cache[key] = entry
+                while len(_response_cache) > RESPONSE_CACHE_SIZE:
+                    _response_cache.popitem(last=False)
+
+        body, mimetype, etag, headers = entry
+        response = app.response_class(body, mimetype=mimetype, headers=headers)
+        response.set_etag(etag)
+        # Browsers may keep the body but must revalidate it with If-None-Match
+        response.headers['Cache-Control'] = 'no-cache'
+        return response.make_conditional(request)
+    return wrapper
+
+@app.after_request
+def invalidate_cache(response):
+    global _write_counter
+    if request.method in ('POST', 'PUT', 'DELETE') and request.path.startswith('/api/'):
+        with _cache_lock:
+            _write_counter += 1
+            _response_cache.clear()
+    return response
+
+# Serve the web interface. After `python web/build_assets.py` the bundled,
+# content-hashed files in web/dist are served instead of the sources in web/,
+# as long as the build still matches the sources (see dist_is_current).
+WEB_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'web')
+DIST_DIR = os.path.join(WEB_DIR, 'dist')
+HASHED_ASSET = re.compile(r'\.[0-9a-f]{10}\.(js|css)$')
+PRECOMPRESSED = (('br', '.br'), ('gzip', '.gz'))
+# dist_is_current() re-reads the manifest and stats the sources at most this often (seconds)
+DIST_CHECK_INTERVAL = 2.0
+
+_dist_state = {'key': None, 'current': False, 'checked_at': None}
+_dist_lock = threading.Lock()
+
+def _file_signature(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+def dist_is_current():
+    """
+    True when web/dist was built from the current sources: every source hash recorded in
+    dist/manifest.json matches the file in web/. The manifest and sources are looked at no more than
+    once per DIST_CHECK_INTERVAL, and the sources are re-hashed only when a file's mtime or size changes.
+    """
+    now = time.monotonic()
+    with _dist_lock:
+        checked_at = _dist_state['checked_at']
+        if checked_at is not None and now - checked_at < DIST_CHECK_INTERVAL:
+            return _dist_state['current']
+
+    manifest_path = os.path.join(DIST_DIR, 'manifest.json')
+    try:
+        with open(manifest_path, encoding='utf-8') as f:
+            sources = json.load(f).get('sources') or {}
+    except (OSError, ValueError):
+        with _dist_lock:
+            _dist_state.update(key=None, current=False, checked_at=now)
+        return False
+    key = (_file_signature(manifest_path),) + tuple(
+        (name, _file_signature(os.path.join(WEB_DIR, name))) for name in sorted(sources))
+
+    with _dist_lock:
+        if _dist_state['key'] != key:
+            current = bool(sources)
+            for name, digest in sources.items():
+                try:
+                    with open(os.path.join(WEB_DIR, name), 'rb') as f:
+                        current = current and hashlib.sha256(f.read()).hexdigest()[:16] == digest
+                except OSError:
+                    current = False
+            if not current:
+                app.logger.warning("web/dist is out of date with web/; serving the sources. "
+                                   "Run `python web/build_assets.py` to rebuild.")
+            _dist_state.update(key=key, current=current)
+        _dist_state['checked_at'] = now
+        return _dist_state['current']
+
+def send_asset(path):
+    """Send a web file, preferring an up-to-date web/dist and its precompressed variants"""
+    if not os.path.isfile(os.path.join(DIST_DIR, path)) or not dist_is_current():
+        return send_from_directory(WEB_DIR, path)
+
+    mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    response = None
+    for encoding, suffix in PRECOMPRESSED:
+        if encoding in request.accept_encodings and os.path.isfile(os.path.join(DIST_DIR, path + suffix)):
+            response = send_from_directory(DIST_DIR, path + suffix, mimetype=mimetype)
+            response.content_encoding = encoding
+            break
+    if response is None:
+        response = send_from_directory(DIST_DIR, path)
+    response.vary.add('Accept-Encoding')
+
+    if HASHED_ASSET.search(path):
+        # The name changes whenever the content does, so it never needs revalidating
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = 31536000
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+    return response
+
 @app.route('/')
 def index():
-    return send_from_directory('web', 'index.html')
+    return send_asset('index.html')
 
 @app.route('/<path:path>')
 def serve_static(path):
-    return send_from_directory('web', path)
+    return send_asset(path)
 
 # API Routes
 
-@app.route('/api/goals', methods=['GET'])
-def get_goals():
-    """Get all active goals with statistics"""
-    conn = database.create_connection()
+# Query helpers shared by the single-purpose endpoints and /api/dashboard.
+# Each takes an open connection and returns plain JSON-ready data.
+
+def query_goals(conn):
+    """Active goals with event counts and total hours"""
     c = conn.cursor()
     
     # Get goals with event counts and total time
@@ -54,15 +347,19 @@ def get_goals():
             'event_count': row[5],
             'total_hours': round(row[6], 1)
         })
-    
-    conn.close()
-    return jsonify(goals)
+    return goals
+
+@app.route('/api/goals', methods=['GET'])
+@cached_response
+def get_goals():
+    """Get all active goals with statistics"""
+    return jsonify(query_goals(get_db()))
 
 @app.route('/api/goals', methods=['POST'])
 def create_goal():
     """Create a new goal"""
     data = request.json
-    conn = database.create_connection()
+    conn = get_db()
     
     try:
         database.add_goal(
@@ -71,30 +368,26 @@ def create_goal():
             data.get('priority_level', 2),
             data.get('energy_cost', 0)
         )
-        conn.close()
         return jsonify({'success': True, 'message': 'Goal created successfully'})
     except Exception as e:
-        conn.close()
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/goals/<int:goal_id>', methods=['DELETE'])
 def archive_goal(goal_id):
     """Archive a goal"""
-    conn = database.create_connection()
+    conn = get_db()
     
     try:
         database.archive_goal_by_id(conn, goal_id)
-        conn.close()
         return jsonify({'success': True, 'message': 'Goal archived successfully'})
     except Exception as e:
-        conn.close()
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/goals/<int:goal_id>', methods=['PUT'])
 def update_goal(goal_id):
     """Update a goal"""
     data = request.json
-    conn = database.create_connection()
+    conn = get_db()
     
     try:
         database.update_goal(
@@ -104,22 +397,52 @@ def update_goal(goal_id):
             data.get('energy_cost'),
             data.get('priority_level')
         )
-        conn.close()
         return jsonify({'success': True, 'message': 'Goal updated successfully'})
     except Exception as e:
-        conn.close()
         return jsonify({'success': False, 'error': str(e)}), 500
 
+EVENTS_PAGE_SIZE = 500
+EVENTS_MAX_PAGE_SIZE = 2000
+
 @app.route('/api/events', methods=['GET'])
+@cached_response
 def get_events():
-    """Get events for specified number of days"""
-    days = request.args.get('days', 7, type=int)
-    conn = database.create_connection()
+    """
+    Get events, newest first.
+    
+    ?start=YYYY-MM-DD&end=YYYY-MM-DD selects [start, end) (end exclusive, optional);
+    without start the last ?days= days are returned (default 7).
+    Results are paged by keyset: pass ?limit= (default 500 for ranges) and the
+    after_ts/after_id of the last row, or follow the Link: rel="next" header.
+    """
+    conn = get_db()
     c = conn.cursor()
     
-    start_date = (datetime.now() - timedelta(days=days - 1)).date()
-    
-    c.execute("""
+    try:
+        start = request.args.get('start')
+        end = request.args.get('end')
+        start_date = date.fromisoformat(start) if start else window_start_from_args()
+        end_date = date.fromisoformat(end) if end else None
+    except ValueError:
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+    
+    limit = request.args.get('limit', EVENTS_PAGE_SIZE if start else None, type=int)
+    if limit is not None:
+        limit = max(1, min(limit, EVENTS_MAX_PAGE_SIZE))
+    after_ts = request.args.get('after_ts')
+    after_id = request.args.get('after_id', type=int)
+    
+    conditions = ["e.timestamp_start >= ?"]
+    params = [database.day_start(start_date)]
+    if end_date is not None:
+        conditions.append("e.timestamp_start < ?")
+        params.append(database.day_start(end_date))
+    if after_ts is not None and after_id is not None:
+        # Keyset pagination: continue strictly after the last (timestamp, id) seen
+        conditions.append("(e.timestamp_start, e.event_id) < (?, ?)")
+        params.extend([after_ts, after_id])
+    
+    sql = f"""
         SELECT 
             e.event_id,
             e.timestamp_start,
@@ -135,10 +458,13 @@ def get_events():
             g.energy_cost
         FROM events e
         LEFT JOIN goals g ON e.goal_id = g.goal_id
-        WHERE DATE(e.timestamp_start) >= ?
-        ORDER BY e.timestamp_start DESC
-    """, (start_date,))
-    
+        WHERE {" AND ".join(conditions)}
+        ORDER BY e.timestamp_start DESC, e.event_id DESC
+    """
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+    c.execute(sql, params)
     events = []
     for row in c.fetchall():
         events.append({
@@ -156,27 +482,31 @@ def get_events():
             'energy_cost': row[11]
         })
     
-    conn.close()
-    return jsonify(events)
+    response = jsonify(events)
+    if limit is not None and len(events) == limit:
+        args = request.args.to_dict()
+        args.update(after_ts=events[-1]['timestamp_start'], after_id=events[-1]['event_id'])
+        response.headers['Link'] = f'<{request.path}?{urlencode(args)}>; rel="next"'
+    return response
 
-@app.route('/api/events/today', methods=['GET'])
-def get_today_events():
-    """Get events for a specific date (defaults to today or offset)"""
-    conn = database.create_connection()
-    c = conn.cursor()
-    
+def target_date_from_args():
+    """Read ?date=YYYY-MM-DD, falling back to ?offset_days (default 0 for today). Raises ValueError."""
     # Check for specific date first (YYYY-MM-DD)
     date_str = request.args.get('date')
     if date_str:
-        try:
-            target_date = datetime.strptime(date_str, '%Y-%m-%d').date()
-        except ValueError:
-            return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
-    else:
-        # Fallback to offset_days (default 0 for today)
-        offset_days = request.args.get('offset_days', 0, type=int)
-        target_date = (datetime.now() - timedelta(days=offset_days)).date()
-    
+        return datetime.strptime(date_str, '%Y-%m-%d').date()
+    # Fallback to offset_days (default 0 for today)
+    offset_days = request.args.get('offset_days', 0, type=int)
+    return (datetime.now() - timedelta(days=offset_days)).date()
+
+def window_start_from_args():
+    """First day of the ?days= window ending today (default 7 days)"""
+    days = request.args.get('days', 7, type=int)
+    return (datetime.now() - timedelta(days=days - 1)).date()
+
+def query_day_events(conn, target_date):
+    """Events of one day, newest first"""
+    c = conn.cursor()
     c.execute("""
         SELECT 
             e.event_id,
@@ -192,9 +522,9 @@ def get_today_events():
             e.notes
         FROM events e
         LEFT JOIN goals g ON e.goal_id = g.goal_id
-        WHERE DATE(e.timestamp_start) = ?
+        WHERE e.timestamp_start >= ? AND e.timestamp_start < ?
         ORDER BY e.timestamp_start DESC
-    """, (target_date,))
+    """, database.day_bounds(target_date))
     
     events = []
     for row in c.fetchall():
@@ -211,15 +541,23 @@ def get_today_events():
             'emotional_score': row[9],
             'notes': row[10]
         })
-    
-    conn.close()
-    return jsonify(events)
+    return events
+
+@app.route('/api/events/today', methods=['GET'])
+@cached_response
+def get_today_events():
+    """Get events for a specific date (defaults to today or offset)"""
+    try:
+        target_date = target_date_from_args()
+    except ValueError:
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+    return jsonify(query_day_events(get_db(), target_date))
 
 @app.route('/api/events', methods=['POST'])
 def create_event():
     """Create a new event"""
     data = request.json
-    conn = database.create_connection()
+    conn = get_db()
     
     try:
         event = {
@@ -234,17 +572,15 @@ def create_event():
             'notes': data.get('notes', '')
         }
         database.insert_event(conn, event)
-        conn.close()
         return jsonify({'success': True, 'message': 'Event created successfully'})
     except Exception as e:
-        conn.close()
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/events/<int:event_id>/time', methods=['PUT'])
 def update_event_time(event_id):
     """Update event timestamp and duration"""
     data = request.json
-    conn = database.create_connection()
+    conn = get_db()
     c = conn.cursor()
     
     try:
@@ -269,47 +605,23 @@ def update_event_time(event_id):
                 SET duration_minutes = ? 
                 WHERE event_id = ?
             """, (new_duration, event_id))
-            
+
+        # Keep the activity stats index in step with the edited event
+        c.execute("SELECT activity FROM events WHERE event_id = ?", (event_id,))
+        row = c.fetchone()
+        if row:
+            database.refresh_activity_stats(conn, [row[0]])
         conn.commit()
-        conn.close()
         return jsonify({'success': True, 'message': 'Event updated successfully'})
     except Exception as e:
-        conn.close()
         return jsonify({'success': False, 'error': str(e)}), 500
 
-@app.route('/api/health/today', methods=['GET'])
-def get_today_health():
-    """Get health metrics for a specific date (defaults to today or offset)"""
-    conn = database.create_connection()
-    c = conn.cursor()
-    
-    # Check for specific date first (YYYY-MM-DD)
-    date_str = request.args.get('date')
-    if date_str:
-        try:
-            target_date = datetime.strptime(date_str, '%Y-%m-%d').date()
-        except ValueError:
-            return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
-    else:
-        # Fallback to offset_days (default 0 for today)
-        offset_days = request.args.get('offset_days', 0, type=int)
-        target_date = (datetime.now() - timedelta(days=offset_days)).date()
-    
-    # Get all metrics for target date
-    c.execute("""
-        SELECT metric_type, value_numeric
-        FROM health_metrics
-        WHERE DATE(timestamp) = ? AND value_numeric > 0
-    """, (target_date,))
-    
-    metrics = {}
-    for row in c.fetchall():
-        metrics[row[0]] = row[1]
-    
-    conn.close()
+def query_day_health(conn, target_date):
+    """Daily health rollup of one day"""
+    metrics = database.get_daily_health(conn, target_date).get(target_date.isoformat(), {})
     
     # Return structured health data
-    return jsonify({
+    return {
         'sleep_score': metrics.get('sleep_score'),
         'sleep_total_min': metrics.get('sleep_total_min'),
         'rhr_avg': metrics.get('rhr_avg'),
@@ -317,15 +629,26 @@ def get_today_health():
         'hr_max': metrics.get('hr_max'),
         'stress_avg': metrics.get('stress_avg'),
         'steps_total': metrics.get('steps_total')
-    })
+    }
+
+@app.route('/api/health/today', methods=['GET'])
+@cached_response
+def get_today_health():
+    """Get health metrics for a specific date (defaults to today or offset)"""
+    try:
+        target_date = target_date_from_args()
+    except ValueError:
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+    return jsonify(query_day_health(get_db(), target_date))
 
 @app.route('/api/health/trends', methods=['GET'])
+@cached_response
 def get_health_trends():
     """Get health metric trends"""
     days = request.args.get('days', 14, type=int)
     metric = request.args.get('metric', 'sleep_score')
     
-    conn = database.create_connection()
+    conn = get_db()
     c = conn.cursor()
     
     start_date = (datetime.now() - timedelta(days=days - 1)).date()
@@ -333,9 +656,9 @@ def get_health_trends():
     c.execute("""
         SELECT DATE(timestamp) as date, value_numeric
         FROM health_metrics
-        WHERE metric_type = ? AND DATE(timestamp) >= ?
+        WHERE metric_type = ? AND timestamp >= ?
         ORDER BY date
-    """, (metric, start_date))
+    """, (metric, database.day_start(start_date)))
     
     trends = []
     for row in c.fetchall():
@@ -344,128 +667,124 @@ def get_health_trends():
             'value': row[1]
         })
     
-    conn.close()
     return jsonify(trends)
 
 @app.route('/api/trends', methods=['GET'])
+@cached_response
 def get_trends():
     """Get comprehensive daily trends"""
     days = request.args.get('days', 14, type=int)
-    conn = database.create_connection()
+    conn = get_db()
     c = conn.cursor()
     
     start_date = (datetime.now() - timedelta(days=days - 1)).date()
     
-    # Get all dates in range
+    # Event totals for every date in range, in one grouped query
     c.execute("""
-        SELECT DISTINCT DATE(timestamp_start) as date
-        FROM events
-        WHERE DATE(timestamp_start) >= ?
-        UNION
-        SELECT DISTINCT DATE(timestamp) as date
-        FROM health_metrics
-        WHERE DATE(timestamp) >= ?
-        ORDER BY date DESC
-    """, (start_date, start_date))
+        SELECT 
+            DATE(e.timestamp_start) as date,
+            COUNT(*) as event_count,
+            COALESCE(SUM(e.duration_minutes), 0) / 60.0 as total_hours,
+            COALESCE(SUM(g.energy_cost), 0) as energy_net
+        FROM events e
+        LEFT JOIN goals g ON e.goal_id = g.goal_id
+        WHERE e.timestamp_start >= ?
+        GROUP BY DATE(e.timestamp_start)
+    """, (database.day_start(start_date),))
+    events_by_date = {row[0]: row[1:] for row in c.fetchall()}
+    
+    # Health metrics for every date in range, from the daily rollup
+    health_by_date = database.get_daily_health(conn, start_date, date.max)
     
-    dates = [row[0] for row in c.fetchall()]
+    dates = sorted(set(events_by_date) | set(health_by_date), reverse=True)
     
     trends = []
-    for date in dates:
-        # Get health metrics for this date
-        c.execute("""
-            SELECT metric_type, value_numeric
-            FROM health_metrics
-            WHERE DATE(timestamp) = ?
-        """, (date,))
-        
-        metrics = {}
-        for row in c.fetchall():
-            metrics[row[0]] = row[1]
-        
-        # Get events for this date
-        c.execute("""
-            SELECT 
-                COUNT(*) as event_count,
-                COALESCE(SUM(e.duration_minutes), 0) / 60.0 as total_hours,
-                COALESCE(SUM(g.energy_cost), 0) as energy_net
-            FROM events e
-            LEFT JOIN goals g ON e.goal_id = g.goal_id
-            WHERE DATE(e.timestamp_start) = ?
-        """, (date,))
-        
-        event_data = c.fetchone()
+    for day in dates:
+        metrics = health_by_date.get(day, {})
+        event_count, total_hours, energy_net = events_by_date.get(day, (0, 0.0, 0))
         
         trends.append({
-            'date': date,
+            'date': day,
             'sleep_score': metrics.get('sleep_score'),
             'rhr_avg': metrics.get('rhr_avg'),
             'stress_avg': metrics.get('stress_avg'),
             'steps_total': metrics.get('steps_total'),
-            'event_count': event_data[0] if event_data else 0,
-            'total_hours': round(event_data[1], 1) if event_data else 0,
-            'energy_net': event_data[2] if event_data else 0
+            'event_count': event_count,
+            'total_hours': round(total_hours, 1),
+            'energy_net': energy_net
         })
     
-    conn.close()
     return jsonify(trends)
 
-@app.route('/api/stats/energy-states', methods=['GET'])
-def get_energy_states():
-    """Get energy state distribution"""
-    days = request.args.get('days', 7, type=int)
-    conn = database.create_connection()
-    c = conn.cursor()
-    
-    start_date = (datetime.now() - timedelta(days=days - 1)).date()
-    
-    c.execute("""
-        SELECT key_state, COUNT(*) as count
-        FROM events
-        WHERE DATE(timestamp_start) >= ?
-        GROUP BY key_state
-    """, (start_date,))
-    
-    states = {}
-    for row in c.fetchall():
-        states[row[0]] = row[1]
-    
-    conn.close()
-    return jsonify(states)
-
-@app.route('/api/stats/balance', methods=['GET'])
-def get_energy_balance():
-    """Get daily energy balance"""
-    days = request.args.get('days', 7, type=int)
-    conn = database.create_connection()
+def query_energy_stats(conn, start_date):
+    """
+    Energy state distribution and daily energy balance since start_date,
+    both derived from one grouped scan of the events in the window.
+    """
     c = conn.cursor()
-    
-    start_date = (datetime.now() - timedelta(days=days - 1)).date()
-    
     c.execute("""
         SELECT 
             DATE(e.timestamp_start) as date,
+            e.key_state,
+            COUNT(*) as count,
             COALESCE(SUM(g.energy_cost), 0) as balance
         FROM events e
         LEFT JOIN goals g ON e.goal_id = g.goal_id
-        WHERE DATE(e.timestamp_start) >= ?
-        GROUP BY DATE(e.timestamp_start)
+        WHERE e.timestamp_start >= ?
+        GROUP BY date, e.key_state
         ORDER BY date
-    """, (start_date,))
+    """, (database.day_start(start_date),))
     
-    balance = []
-    for row in c.fetchall():
-        balance.append({
-            'date': row[0],
-            'balance': row[1]
-        })
+    states = {}
+    balance_by_date = {}
+    for day, key_state, count, balance in c.fetchall():
+        states[key_state] = states.get(key_state, 0) + count
+        balance_by_date[day] = balance_by_date.get(day, 0) + balance
     
-    conn.close()
+    balance = [{'date': day, 'balance': value} for day, value in balance_by_date.items()]
+    return states, balance
+
+@app.route('/api/stats/energy-states', methods=['GET'])
+@cached_response
+def get_energy_states():
+    """Get energy state distribution"""
+    states, _ = query_energy_stats(get_db(), window_start_from_args())
+    return jsonify(states)
+
+@app.route('/api/stats/balance', methods=['GET'])
+@cached_response
+def get_energy_balance():
+    """Get daily energy balance"""
+    _, balance = query_energy_stats(get_db(), window_start_from_args())
     return jsonify(balance)
 
+@app.route('/api/dashboard', methods=['GET'])
+@cached_response
+def get_dashboard():
+    """
+    Everything the dashboard page shows, in one response: the selected day's
+    events and health metrics (?date= / ?offset_days=), active goals, and the
+    energy state distribution and balance over the last ?days= days.
+    """
+    try:
+        target_date = target_date_from_args()
+    except ValueError:
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+    
+    conn = get_db()
+    energy_states, balance = query_energy_stats(conn, window_start_from_args())
+    return jsonify({
+        'date': target_date.isoformat(),
+        'events': query_day_events(conn, target_date),
+        'goals': query_goals(conn),
+        'health': query_day_health(conn, target_date),
+        'energy_states': energy_states,
+        'balance': balance
+    })
+
 @app.route('/api/import', methods=['POST'])
 def import_csv_data():
-    """Import health data from CSV file"""
+    """Queue a health data CSV import and return its job id (poll /api/import/jobs/<job_id>)"""
     if 'file' not in request.files:
         return jsonify({'success': False, 'error': 'No file provided'}), 400
     
@@ -477,94 +796,115 @@ def import_csv_data():
     if not file.filename.endswith('.csv'):
         return jsonify({'success': False, 'error': 'File must be CSV format'}), 400
     
+    # Parse based on filename: exact export names first, then looser matches for renamed files
+    filename = file.filename.lower()
+    detected = detect_parser(filename)
+    
+    if detected is not None:
+        _, parser, writer = detected
+    elif 'aggregated' in filename:
+        parser, writer = parse_aggregated_data, database.insert_health_metrics_stream
+    elif 'sport' in filename or 'record' in filename:
+        parser, writer = parse_sport_records, database.insert_health_metrics_stream
+    else:
+        return jsonify({
+            'success': False,
+            'error': 'Unsupported file. Please upload aggregated_fitness_data, sport_record or fitness_data CSV files.'
+        }), 400
+    
     try:
-        # Save file temporarily
-        import tempfile
-        import os
-        from importer import parse_aggregated_data, parse_sport_records
-        
-        # Create temp file and save uploaded file
+        # Save the upload to a temp file; the background job deletes it when done
         tmp = tempfile.NamedTemporaryFile(mode='wb', delete=False, suffix='.csv')
         tmp_path = tmp.name
         file.save(tmp_path)
         tmp.close()  # Close to ensure file is written to disk
         
-        try:
-            # Parse based on filename
-            metrics_data = []
-            filename = file.filename.lower()
-            
-            if 'aggregated' in filename or 'fitness_data' in filename:
-                metrics_data = parse_aggregated_data(tmp_path)
-            elif 'sport' in filename or 'record' in filename:
-                metrics_data = parse_sport_records(tmp_path)
-            else:
-                return jsonify({
-                    'success': False,
-                    'error': 'Unsupported file. Please upload aggregated_fitness_data or sport_record CSV files.'
-                }), 400
-            
-            if not metrics_data:
-                return jsonify({
-                    'success': False,
-                    'error': 'No valid data found in file'
-                }), 400
-            
-            # Import to database
-            conn = database.create_connection()
-            database.insert_health_metrics_batch(conn, metrics_data)
-            conn.close()
-            
-            return jsonify({
-                'success': True,
-                'records_imported': len(metrics_data),
-                'message': f'Successfully imported {len(metrics_data)} health records'
-            })
-            
-        finally:
-            # Clean up temporary file
-            if os.path.exists(tmp_path):
-                os.unlink(tmp_path)
-        
+        job_id = import_jobs.submit(tmp_path, file.filename, parser, writer)
     except Exception as e:
         return jsonify({
             'success': False,
             'error': f'Import failed: {str(e)}'
         }), 500
+    
+    return jsonify({
+        'success': True,
+        'job_id': job_id,
+        'status': 'queued',
+        'status_url': f'/api/import/jobs/{job_id}'
+    }), 202
+
+@app.route('/api/import/jobs/<job_id>', methods=['GET'])
+def get_import_job(job_id):
+    """Get progress of an import job: rows parsed/inserted, duplicates skipped and ETA"""
+    job = import_jobs.get_status(get_db(), job_id)
+    if job is None:
+        return jsonify({'error': 'Import job not found'}), 404
+    return jsonify(job)
+
+@app.route('/api/_metrics', methods=['GET'])
+def get_metrics():
+    """Request, SQL and JSON timing metrics in Prometheus text format"""
+    return app.response_class(request_metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/plot/<metric>.png', methods=['GET'])
+def get_plot(metric):
+    """Trend chart PNG for one health metric; unchanged charts come from the render cache"""
+    if metric not in plots.PLOT_METRICS:
+        return jsonify({'error': f'Unknown metric. Use one of: {", ".join(plots.PLOT_METRICS)}'}), 404
+    days = request.args.get('days', 30, type=int)
+    if not 1 <= days <= 366:
+        return jsonify({'error': 'days must be between 1 and 366'}), 400
+
+    # Another request may prune the cached file between rendering and sending it; render again once
+    for attempt in range(2):
+        path = plots.render_plots(get_db(), [metric], days, executor=plots.shared_executor())[metric]
+        if path is None:
+            return jsonify({'error': f'No {metric} data in the last {days} days'}), 404
+        try:
+            # The cache file name already encodes the metric, range and data digest
+            response = send_file(path, mimetype='image/png', etag=os.path.basename(path), max_age=0,
+                                 conditional=True)
+            break
+        except FileNotFoundError:
+            if attempt:
+                raise
+    response.cache_control.no_cache = True
+    return response
 
 @app.route('/api/report', methods=['GET'])
+@cached_response
 def get_weekly_report():
     """Get weekly report data"""
     try:
-        conn = database.create_connection()
+        conn = get_db()
         days = request.args.get('days', 7, type=int)
         report_data = analysis.get_weekly_report_data(conn, days)
-        conn.close()
         return jsonify(report_data)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/plan', methods=['GET'])
+@cached_response
 def get_daily_plan():
     """Get daily plan data"""
     try:
-        conn = database.create_connection()
+        conn = get_db()
         plan_data = analysis.get_daily_plan_data(conn)
-        conn.close()
         return jsonify(plan_data)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 if __name__ == '__main__':
+    # Development server only; use `emanager serve` in production.
     # Ensure database is initialized
     conn = database.create_connection()
-    database.create_tables(conn)
-    database.migrate_db(conn)
+    database.ensure_schema(conn)
     conn.close()
+    import_jobs.fail_interrupted_jobs()
     
     # Run the server
     print("\n=================================================")
-    print("Energy Manager Web Interface Starting...")
+    print("Energy Manager Web Interface Starting (development server)...")
     print("=================================================")
     print("\nAccess the web interface at: http://localhost:5000")
     print("\nPress Ctrl+C to stop the server\n")